@@ -1,7 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import chat, analytics
+from app.api.v1.endpoints import chat, analytics, audio, admin
 
 api_router = APIRouter()
 
 api_router.include_router(chat.router, prefix="/chat", tags=["chatbot"])
-api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
\ No newline at end of file
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(audio.router, prefix="/audio", tags=["audio"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
@@ -1,6 +1,9 @@
-from fastapi import Security, HTTPException, status
+import secrets
+from typing import Optional
+from fastapi import Security, HTTPException, Header, status
 from fastapi.security import APIKeyHeader
 from app.core.config import settings
+from app.core.tenants import Tenant, UnknownTenant, get_tenant_registry
 
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key")
 
@@ -14,4 +17,28 @@ async def get_api_key(api_key_header: str = Security(API_KEY_HEADER)):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
+        )
+
+async def get_admin_api_key(api_key_header: str = Security(API_KEY_HEADER)):
+    """
+    Dependency to validate the X-API-Key header against ADMIN_API_KEY for the admin endpoints.
+    The admin endpoints are disabled while ADMIN_API_KEY is unset.
+    """
+    if settings.ADMIN_API_KEY and secrets.compare_digest(api_key_header, settings.ADMIN_API_KEY):
+        return api_key_header
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Could not validate credentials",
+    )
+
+async def get_tenant(x_tenant_id: Optional[str] = Header(None)) -> Tenant:
+    """
+    Dependency resolving the tenant named by the X-Tenant-ID header; the default tenant if absent.
+    """
+    try:
+        return get_tenant_registry().get(x_tenant_id)
+    except UnknownTenant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown tenant",
         )
\ No newline at end of file
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from app.core import knowledge
+from app.core.tenants import Tenant
+from app.services.chat_service import ChatService, get_chat_service
+from app.api.v1.schemas.admin import KnowledgeStatus, TenantStatus
+from app.api.v1.dependencies import get_admin_api_key, get_tenant
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+async def _knowledge_status(chat_service: ChatService, tenant: Tenant) -> KnowledgeStatus:
+    published = await asyncio.to_thread(knowledge.get_current_version, tenant)
+    versions = await asyncio.to_thread(knowledge.list_versions, tenant)
+    loaded = chat_service.knowledge.peek(tenant.id)
+    return KnowledgeStatus(
+        tenant_id=tenant.id,
+        published_version=published,
+        loaded_version=loaded.version if loaded else None,
+        building=chat_service.knowledge.building(tenant.id),
+        last_build_error=chat_service.knowledge.build_errors.get(tenant.id),
+        available_versions=versions,
+    )
+
+@router.get("/knowledge", response_model=KnowledgeStatus, dependencies=[Depends(get_admin_api_key)])
+async def read_knowledge_status(
+    tenant: Tenant = Depends(get_tenant),
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    """
+    Returns the published knowledge index version of the `X-Tenant-ID` tenant and the one loaded by this worker.
+    """
+    return await _knowledge_status(chat_service, tenant)
+
+@router.post("/knowledge/reload", response_model=KnowledgeStatus, dependencies=[Depends(get_admin_api_key)])
+async def reload_knowledge(
+    response: Response,
+    version: Optional[str] = None,
+    tenant: Tenant = Depends(get_tenant),
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    """
+    Hot-reloads the knowledge index of the `X-Tenant-ID` tenant without restarting the workers.
+
+    Without `version`, a new index is built from the tenant's knowledge sources in the
+    background and the call returns `202` immediately. With `version`, that
+    already-built index is published and loaded (e.g. to roll back). Either way,
+    the other workers switch on their next poll and in-flight answers finish on
+    the index they started with. Returns `409` while this worker is already
+    rebuilding the tenant's index.
+    """
+    if version is None:
+        if not chat_service.knowledge.start_rebuild(tenant):
+            raise HTTPException(status_code=409, detail="A knowledge rebuild is already running")
+        response.status_code = 202
+        return await _knowledge_status(chat_service, tenant)
+
+    if not knowledge.version_exists(version, tenant):
+        raise HTTPException(status_code=404, detail="Knowledge version not found")
+    try:
+        await chat_service.knowledge.reload(tenant, version, publish=True)
+    except Exception as e:
+        logger.exception(f"Could not load knowledge version {version} of tenant {tenant.id}: {e}")
+        raise HTTPException(status_code=500, detail="Could not load the knowledge version")
+    return await _knowledge_status(chat_service, tenant)
+
+@router.get("/tenants", response_model=List[TenantStatus], dependencies=[Depends(get_admin_api_key)])
+async def read_tenants(chat_service: ChatService = Depends(get_chat_service)):
+    """
+    Per-tenant knowledge state and usage counters of the worker that answers.
+    """
+    return chat_service.knowledge.snapshot()
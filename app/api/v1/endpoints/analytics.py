@@ -1,14 +1,28 @@
+import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.crud import crud_conversation
-from app.core.database import get_session
-from app.api.v1.schemas.analytics import Conversation
+from app.crud import crud_conversation, crud_analytics
+from app.core.database import get_session, get_pool_stats
+from app.api.v1.schemas.analytics import Conversation, AnalyticsRollupBucket, PoolStats
 from app.api.v1.dependencies import get_api_key
 
 router = APIRouter()
 
+# Default look-back windows and the maximum number of buckets a single query may span.
+DEFAULT_ROLLUP_WINDOWS = {
+    "hour": datetime.timedelta(hours=24),
+    "day": datetime.timedelta(days=30),
+}
+MAX_ROLLUP_BUCKETS = 2000
+
+def _to_naive_utc(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    """Rollup buckets are stored as naive UTC timestamps, like the conversation logs."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
 @router.get("/", response_model=List[Conversation], dependencies=[Depends(get_api_key)])
 async def read_conversations(
     skip: int = 0,
@@ -22,3 +36,35 @@ async def read_conversations(
         raise HTTPException(status_code=400, detail="Invalid pagination parameters")
     conversations = await crud_conversation.get_conversations(db, skip=skip, limit=limit)
     return conversations
+
+@router.get("/rollups", response_model=List[AnalyticsRollupBucket], dependencies=[Depends(get_api_key)])
+async def read_rollups(
+    granularity: str = "hour",
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    db: AsyncSession = Depends(get_session)
+):
+    """
+    Retrieve pre-aggregated usage statistics per hour or per day.
+    Buckets are maintained incrementally as conversations are logged, so this
+    endpoint never scans the conversation logs. Protected by an API key.
+    """
+    if granularity not in crud_analytics.ROLLUP_GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+
+    end = _to_naive_utc(end) or datetime.datetime.utcnow()
+    start = _to_naive_utc(start) or end - DEFAULT_ROLLUP_WINDOWS[granularity]
+    bucket_size = datetime.timedelta(hours=1) if granularity == "hour" else datetime.timedelta(days=1)
+    if start >= end or (end - start) / bucket_size > MAX_ROLLUP_BUCKETS:
+        raise HTTPException(status_code=400, detail="Invalid time range")
+
+    return await crud_analytics.get_rollups(db, granularity=granularity, start=start, end=end)
+
+
+@router.get("/db-pool", response_model=PoolStats, dependencies=[Depends(get_api_key)])
+async def read_pool_stats():
+    """
+    Report database connection pool usage for the worker serving this request:
+    connections in use, overflow, checkout wait times and pool timeouts.
+    """
+    return get_pool_stats()
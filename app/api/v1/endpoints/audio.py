@@ -0,0 +1,91 @@
+import os
+import re
+from typing import Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.utils import iter_file, get_tts_cache_path
+
+router = APIRouter()
+
+_AUDIO_ID = re.compile(r"^[0-9a-f]{64}$")
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Cached audio is content-addressed, so a given URL never changes
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match."""
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns the inclusive (start, end) of a single byte range, or None to serve the whole file.
+    Multiple ranges are not supported and are answered with the whole file, as HTTP allows.
+    """
+    match = _BYTE_RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+@router.get("/{audio_id}.mp3", name="get_audio")
+async def get_audio(audio_id: str, request: Request):
+    """
+    Serves a synthesized answer by reference.
+
+    Supports `Range` requests for seeking and resumed downloads, and `If-None-Match`
+    revalidation. The file is streamed from disk and may be cached indefinitely.
+    """
+    if not _AUDIO_ID.match(audio_id):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    path = os.path.join(settings.AUDIO_DIR, get_tts_cache_path(audio_id))
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    etag = f'"{audio_id}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_file(path), media_type="audio/mpeg", headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(iter_file(path, start, length), status_code=206, media_type="audio/mpeg", headers=headers)
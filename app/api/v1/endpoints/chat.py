@@ -1,19 +1,31 @@
+import os
 import json
+import time
+import logging
 from typing import Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks, Request
 from fastapi.responses import StreamingResponse, JSONResponse
-from langdetect import detect, LangDetectException
 
 from app.services.chat_service import ChatService, get_chat_service
 from app.services.audio_service import AudioService, get_audio_service
 from app.core.config import settings
-from app.core.limiter import limiter
+from app.core.limiter import limiter, request_cost
+from app.core.metrics import STAGE_DURATION, LANGUAGE_RESOLUTIONS
+from app.core.language import resolve_language
+from app.core import tracing
+from app.core.tenants import Tenant
+from app.api.v1.dependencies import get_tenant
+from app.core.admission import AdmissionRejected
+from app.core.utils import iter_file, get_tts_cache_path
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+AUDIO_DELIVERY_MODES = ("multipart", "url")
+
 @router.post("/")
-@limiter.limit("15/minute")
 async def handle_chat(
     request: Request,
     background_tasks: BackgroundTasks,
@@ -21,7 +33,9 @@ async def handle_chat(
     message: str | None = Form(None),
     audio_file: UploadFile | None = File(None),
     include_audio_response: bool = Form(False),
-    language: str = Form("en-US"),
+    audio_delivery: str = Form("multipart"),
+    language: str | None = Form(None),
+    tenant: Tenant = Depends(get_tenant),
     chat_service: ChatService = Depends(get_chat_service),
     audio_service: AudioService = Depends(get_audio_service),
 ):
@@ -29,30 +43,52 @@ async def handle_chat(
     Handles chat interactions with support for audio input (STT) and output (TTS).
     
     This endpoint accepts multipart/form-data. Provide either a text `message` or an `audio_file`.
+    The `X-Tenant-ID` header selects the portfolio that answers (the default one if omitted).
     - If `audio_file` is sent, it is transcribed to text.
     - If `include_audio_response` is true, the chatbot's response is converted to an MP3.
+    - `language` ('en-US' or 'id-ID') is a hint. The request language is resolved once, from the
+      language heard by speech recognition, then the detected language of the message, then the hint,
+      and is used for recognition, the answer, suggested questions and the voice.
     
     The response format depends on the `include_audio_response` flag:
     - If `False` (default): Returns a standard JSON response.
-    - If `True`: Returns a `multipart/mixed` response with two parts: the JSON data and the MP3 audio data.
+    - If `True`: With `audio_delivery="multipart"` (default), returns a `multipart/mixed` response with
+      two parts: the JSON data and the MP3 audio data. With `audio_delivery="url"`, returns JSON with an
+      `audio_url` pointing at the cached MP3, which supports range requests and long-lived caching.
+
+    Requests draw from a per-client token bucket weighted by cost (audio in, audio out,
+    message length); an empty bucket yields 429 with `Retry-After`.
+    When the upstream models are saturated the request is rejected with 503 and a
+    `Retry-After` header; if only TTS is saturated, the answer is returned without audio.
     """
     if not settings.GOOGLE_API_KEY:
         raise HTTPException(status_code=503, detail="Service temporarily unavailable: missing Google API key")
+    if audio_delivery not in AUDIO_DELIVERY_MODES:
+        raise HTTPException(status_code=400, detail=f"audio_delivery must be one of: {', '.join(AUDIO_DELIVERY_MODES)}.")
+
+    request_started_at = time.perf_counter()
+
+    await limiter.hit(
+        request,
+        cost=request_cost(message, audio_in=audio_file is not None, audio_out=include_audio_response),
+    )
 
     user_audio_bytes: Optional[bytes] = None
+    stt_language_code: Optional[str] = None
     
     if audio_file:
         user_audio_bytes = await audio_file.read()
         try:
-            user_message = await audio_service.transcribe_audio(
+            user_message, stt_language_code = await audio_service.transcribe_audio(
                 audio_bytes=user_audio_bytes,
                 content_type=audio_file.content_type,
-                language=language
+                language=language,
+                phrases=tenant.stt_phrases,
             )
         except Exception as e:
-            if isinstance(e, HTTPException):
+            if isinstance(e, (HTTPException, AdmissionRejected)):
                 raise e
-            print(f"Error during audio transcription: {e}")
+            logger.exception(f"Error during audio transcription: {e}")
             raise HTTPException(status_code=500, detail="Failed to process audio file.")
     elif message:
         user_message = message
@@ -61,14 +97,23 @@ async def handle_chat(
 
     if not user_message or not user_message.strip():
         raise HTTPException(status_code=400, detail="Input message cannot be empty.")
+
+    language_context = resolve_language(hint=language, message=user_message, stt_language_code=stt_language_code)
+    LANGUAGE_RESOLUTIONS.labels(language=language_context.code, source=language_context.source).inc()
+    if span := tracing.current_span():
+        span.set_attribute("language", language_context.code)
+        span.set_attribute("tenant", tenant.id)
     
     full_answer = ""
     suggested_questions = []
     mailto_link = None
+    intent = None
     
     response_generator = chat_service.stream_response(
         session_id=str(session_id),
         message=user_message,
+        language=language_context,
+        tenant=tenant,
     )
     
     async for event in response_generator:
@@ -81,27 +126,25 @@ async def handle_chat(
             data = json.loads(data_str)
             suggested_questions = data.get("suggested_questions", [])
             mailto_link = data.get("mailto")
+            intent = data.get("intent")
 
     response_json = {
         "ai_response": full_answer,
         "suggested_questions": suggested_questions,
         "mailto": mailto_link,
+        "language": language_context.code,
     }
     
-    ai_audio_bytes: Optional[bytes] = None
+    audio_id: Optional[str] = None
     if include_audio_response and full_answer.strip():
         try:
-            try:
-                detected_lang_iso = detect(full_answer)
-            except LangDetectException:
-                detected_lang_iso = "en"
-            
-            tts_language_code = "id-ID" if detected_lang_iso == "id" else "en-US"
-            
-            ai_audio_bytes = await audio_service.synthesize_speech(full_answer, language=tts_language_code)
-            
+            audio_id = await audio_service.synthesize_to_cache(full_answer, language=language_context.locale, voices=tenant.voices)
+        except AdmissionRejected:
+            # TTS is overloaded: degrade to a text-only answer
+            logger.warning("Speech synthesis skipped: TTS is overloaded")
+            include_audio_response = False
         except Exception as e:
-            print(f"Error during speech synthesis: {e}")
+            logger.exception(f"Error during speech synthesis: {e}")
             include_audio_response = False
     
     background_tasks.add_task(
@@ -112,30 +155,36 @@ async def handle_chat(
         suggested_questions=suggested_questions,
         mailto=mailto_link,
         user_audio_bytes=user_audio_bytes,
-        ai_audio_bytes=ai_audio_bytes,
+        ai_audio_cache_path=get_tts_cache_path(audio_id) if audio_id else None,
+        intent=intent,
     )
 
-    if not include_audio_response or not ai_audio_bytes:
+    STAGE_DURATION.labels(stage="request").observe(time.perf_counter() - request_started_at)
+
+    if not include_audio_response or not audio_id:
+        return JSONResponse(content=response_json)
+
+    if audio_delivery == "url":
+        response_json["audio_url"] = f"{settings.API_V1_STR}/audio/{audio_id}.mp3"
         return JSONResponse(content=response_json)
 
+    audio_path = os.path.join(settings.AUDIO_DIR, get_tts_cache_path(audio_id))
+    boundary = uuid4().hex
+
     async def multipart_generator():
         # The JSON data
         yield (
-            b'--boundary\r\n'
-            b'Content-Type: application/json\r\n\r\n' +
+            f'--{boundary}\r\nContent-Type: application/json\r\n\r\n'.encode('utf-8') +
             json.dumps(response_json).encode('utf-8') +
             b'\r\n'
         )
-        # The MP3 audio data
-        yield (
-            b'--boundary\r\n'
-            b'Content-Type: audio/mpeg\r\n\r\n' +
-            ai_audio_bytes + # Use the audio bytes we generated
-            b'\r\n'
-        )
-        yield b'--boundary--\r\n'
+        # The MP3 audio data, streamed from the TTS cache
+        yield f'--{boundary}\r\nContent-Type: audio/mpeg\r\n\r\n'.encode('utf-8')
+        async for chunk in iter_file(audio_path):
+            yield chunk
+        yield f'\r\n--{boundary}--\r\n'.encode('utf-8')
 
     return StreamingResponse(
         multipart_generator(),
-        media_type="multipart/mixed; boundary=boundary"
+        media_type=f"multipart/mixed; boundary={boundary}"
     )
\ No newline at end of file
@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class KnowledgeStatus(BaseModel):
+    """
+    Schema for a tenant's knowledge index state as seen by the worker that answered.
+    """
+    tenant_id: str
+    published_version: Optional[str] = None
+    loaded_version: Optional[str] = None
+    building: bool = False
+    last_build_error: Optional[str] = None
+    available_versions: List[str] = Field(default_factory=list)
+
+
+class TenantStatus(BaseModel):
+    """
+    Schema for a tenant's loaded index and usage counters in one worker.
+    """
+    tenant_id: str
+    loaded: bool
+    loaded_version: Optional[str] = None
+    memory_mb: float = 0.0
+    cached_chains: int = 0
+    building: bool = False
+    requests: int = 0
+    index_loads: int = 0
+    evictions: int = 0
+    reloads: int = 0
+    chain_builds: int = 0
+    last_load_seconds: Optional[float] = None
+    last_used: Optional[float] = None
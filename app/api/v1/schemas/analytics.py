@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class ConversationBase(BaseModel):
     session_id: str
@@ -20,4 +20,39 @@ class Conversation(ConversationBase):
     timestamp: datetime.datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class AnalyticsRollupBucket(BaseModel):
+    """
+    Schema for a single hourly or daily analytics bucket.
+    Answer-length percentiles are upper bounds (in characters) of histogram buckets.
+    """
+    granularity: str
+    bucket_start: datetime.datetime
+    message_count: int = 0
+    distinct_sessions: int = 0
+    intents: Dict[str, int] = Field(default_factory=dict)
+    audio_in: int = 0
+    audio_out: int = 0
+    mailto_conversions: int = 0
+    answer_length_histogram: Dict[str, int] = Field(default_factory=dict)
+    answer_length_percentiles: Dict[str, Optional[int]] = Field(default_factory=dict)
+
+
+class PoolStats(BaseModel):
+    """
+    Schema for the database connection pool usage of a single worker.
+    """
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    checkout_wait_avg_ms: float
+    checkout_wait_max_ms: float
+    overflow_events: int
+    timeouts: int
+    connects: int
+    connect_avg_ms: float
\ No newline at end of file
@@ -22,6 +22,8 @@ class FinalStreamResponse(BaseModel):
     """
     suggested_questions: Optional[List[str]] = None
     mailto: Optional[str] = None
+    intent: Optional[str] = None
+    language: Optional[str] = None
 
 class UserIntent(str, Enum):
     """
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+
+class Priority(IntEnum):
+    """
+    Admission priority; lower values are admitted first.
+    """
+    HIGH = 0 # cheap helper calls and recruiter conversations
+    NORMAL = 1
+    LOW = 2 # background and bulk work
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a call to an upstream resource cannot start within its deadline.
+    """
+    def __init__(self, resource: str, reason: str, retry_after: int):
+        super().__init__(f"{resource} is overloaded ({reason})")
+        self.resource = resource
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, priority: Priority, seq: int, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+
+    @property
+    def rank(self):
+        return (self.priority, self.seq)
+
+
+class _Resource:
+    """
+    A concurrency limit with a bounded, priority-ordered wait queue.
+    When the queue is full, a newcomer displaces the lowest-priority waiter if it outranks it.
+    """
+    def __init__(self, name: str, limit: int, max_queue: int, retry_after: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.active = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.labels(resource=self.name, reason=reason).inc()
+        return AdmissionRejected(self.name, reason, self.retry_after)
+
+    async def acquire(self, priority: Priority, timeout: float) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            victim = max(self._waiters, key=lambda w: w.rank)
+            if victim.priority <= priority:
+                raise self._reject("queue_full")
+            self._waiters.remove(victim)
+            victim.future.set_exception(self._reject("shed"))
+
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            future = waiter.future
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as we gave up; pass it on.
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("deadline") from None
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        """Hands the slot to the best-ranked waiter, or frees it."""
+        while self._waiters:
+            waiter = min(self._waiters, key=lambda w: w.rank)
+            self._waiters.remove(waiter)
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"limit": self.limit, "active": self.active, "queued": len(self._waiters)}
+
+
+class AdmissionController:
+    """
+    Per-worker admission control in front of the LLM and speech clients.
+    Each resource has its own concurrency limit and wait queue, so overload is
+    shed quickly with a 503 instead of piling up upstream timeouts.
+    """
+    def __init__(self, limits: Dict[str, int], max_queue: int, queue_timeout: float, retry_after: int):
+        self.queue_timeout = queue_timeout
+        self._resources = {
+            name: _Resource(name, limit, max_queue, retry_after) for name, limit in limits.items()
+        }
+
+    @asynccontextmanager
+    async def slot(self, resource: str, priority: Priority = Priority.NORMAL, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Holds one concurrency slot of `resource` for the duration of the block.
+        Raises AdmissionRejected if the slot cannot be obtained within the timeout.
+        """
+        target = self._resources[resource]
+        started = time.perf_counter()
+        await target.acquire(priority, self.queue_timeout if timeout is None else timeout)
+        ADMISSION_WAIT.labels(resource=resource).observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            target.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: resource.stats() for name, resource in self._resources.items()}
+
+
+admission = AdmissionController(
+    limits={
+        "main_llm": settings.MAIN_LLM_MAX_CONCURRENCY,
+        "helper_llm": settings.HELPER_LLM_MAX_CONCURRENCY,
+        "fallback_llm": settings.FALLBACK_LLM_MAX_CONCURRENCY,
+        "stt": settings.STT_MAX_CONCURRENCY,
+        "tts": settings.TTS_MAX_CONCURRENCY,
+    },
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
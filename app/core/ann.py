@@ -0,0 +1,112 @@
+import math
+import logging
+from typing import Optional
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 'flat' is exact brute-force search; the others trade some recall for speed and memory
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# FAISS wants at least this many training points per IVF list
+MIN_POINTS_PER_LIST = 39
+
+
+def default_nlist(n_vectors: int) -> int:
+    """About 4·√n inverted lists, capped so every list gets enough training points."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // MIN_POINTS_PER_LIST))
+
+
+def create_index(
+    dim: int,
+    n_vectors: int,
+    index_type: str = "flat",
+    nlist: int = 0,
+    hnsw_m: int = 32,
+    hnsw_ef_construction: int = 64,
+    pq_m: int = 16,
+    pq_nbits: int = 8,
+) -> faiss.Index:
+    """
+    Creates an empty L2 index of the given type for about `n_vectors` vectors of size `dim`.
+
+    - `ivf_flat`: vectors are bucketed into `nlist` clusters (0 picks a size from
+      `n_vectors`); a search scans only the `nprobe` closest ones.
+    - `hnsw`: a navigable small-world graph with `hnsw_m` links per node; no training.
+    - `ivf_pq`: IVF whose vectors are compressed to `pq_m` codes of `pq_nbits` bits,
+      for corpora that do not fit in memory as float vectors.
+
+    Corpora too small to train the requested index get a flat one instead.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = hnsw_ef_construction
+        return index
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = nlist or default_nlist(n_vectors)
+        min_vectors = max(nlist, 2 ** pq_nbits if index_type == "ivf_pq" else 1)
+        if n_vectors < min_vectors:
+            logger.info(f"{n_vectors} vectors are too few to train an {index_type} index, using a flat index")
+        elif index_type == "ivf_flat":
+            return faiss.index_factory(dim, f"IVF{nlist},Flat")
+        else:
+            if dim % pq_m:
+                raise ValueError(f"pq_m ({pq_m}) must divide the embedding dimension ({dim})")
+            return faiss.index_factory(dim, f"IVF{nlist},PQ{pq_m}x{pq_nbits}")
+
+    return faiss.IndexFlatL2(dim)
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, sample_size: int, seed: int = 0) -> None:
+    """Trains the index, if it needs training, on a random sample of at most `sample_size` vectors."""
+    if index.is_trained:
+        return
+    if len(vectors) > sample_size:
+        rows = np.random.default_rng(seed).choice(len(vectors), size=sample_size, replace=False)
+        vectors = vectors[np.sort(rows)]
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def set_search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    """
+    Applies query-time parameters, which are not fixed at build time: `nprobe` for IVF
+    indexes and `ef_search` for HNSW. Larger values raise recall and latency.
+    """
+    if nprobe:
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            ivf = None
+        if ivf is not None:
+            ivf.nprobe = min(nprobe, ivf.nlist)
+    if ef_search and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def describe_index(index: faiss.Index) -> str:
+    """A short label such as 'IVF-PQ nlist=64 nprobe=8' for logs and reports."""
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        kind = "IVF-PQ" if isinstance(faiss.downcast_index(ivf), faiss.IndexIVFPQ) else "IVF-Flat"
+        return f"{kind} nlist={ivf.nlist} nprobe={ivf.nprobe}"
+    if isinstance(index, faiss.IndexHNSW):
+        return f"HNSW efSearch={index.hnsw.efSearch}"
+    return "Flat"
+
+
+def touch_index(index: faiss.Index, k: int = 4) -> None:
+    """
+    Runs one search on a zero vector, so the first real query does not pay for
+    faulting in the index and starting FAISS's thread pool.
+    """
+    if index.ntotal:
+        index.search(np.zeros((1, index.d), dtype=np.float32), min(k, index.ntotal))
@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import List, Literal, Union
 from pydantic import AnyHttpUrl, PostgresDsn, ValidationInfo, field_validator
 
 class Settings(BaseSettings):
@@ -16,18 +16,114 @@ class Settings(BaseSettings):
 
     GOOGLE_API_KEY: str | None = None
     ANALYTICS_API_KEY: str = "REMEMBER-CHANGE-THIS-IN-PROD-DUDE!"
+    ADMIN_API_KEY: str | None = None # rebuilds and swaps knowledge indexes; unset disables the admin endpoints
 
     MAIN_LLM_MODEL: str = "gemini-2.5-pro"
     HELPER_LLM_MODEL: str = "gemini-1.5-flash"
+    FALLBACK_LLM_MODEL: str | None = None # model hedged against a slow main model; defaults to HELPER_LLM_MODEL
     EMBEDDING_MODEL: str = "models/text-embedding-004"
     
     AUDIO_DIR: str = "audio" 
+    # Synthesized answers under AUDIO_DIR/tts; the least recently used are deleted first
+    TTS_CACHE_MAX_AGE_SECONDS: float = 30 * 24 * 3600 # 0 keeps answers regardless of age
+    TTS_CACHE_MAX_BYTES: int = 1024 ** 3 # 0 disables the size cap
+    TTS_CACHE_PRUNE_INTERVAL_SECONDS: float = 3600 # 0 disables pruning
+
+    # Request language: used when neither speech recognition nor detection on the message is conclusive
+    DEFAULT_LANGUAGE: str = "en" # 'en' or 'id'
+    LANGUAGE_DETECTION_MIN_CONFIDENCE: float = 0.8
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json" # 'json' or 'text'
+
+    TRACING_EXPORTER: str = "log" # 'log' (JSON log lines), 'file' (OTLP/JSON lines) or 'none'
+    TRACING_FILE_PATH: str = "traces/spans.jsonl"
+
+    # Requests are profiled when sampled, or when the X-Profile-Key header matches PROFILING_API_KEY
+    PROFILING_API_KEY: str | None = None # unset disables the header trigger
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL: float = 0.001 # seconds between samples
+    PROFILING_DIR: str = "profiles"
+
+    METRICS_ENABLED: bool = True
+    METRICS_API_KEY: str | None = None # if set, /metrics requires 'Authorization: Bearer <key>'
+
+    # Admission control (per worker process): concurrent upstream calls allowed per resource
+    MAIN_LLM_MAX_CONCURRENCY: int = 8
+    HELPER_LLM_MAX_CONCURRENCY: int = 16
+    FALLBACK_LLM_MAX_CONCURRENCY: int = 4 # hedged answers; the main model's slot stays held meanwhile
+    STT_MAX_CONCURRENCY: int = 4
+    TTS_MAX_CONCURRENCY: int = 4
+    ADMISSION_MAX_QUEUE: int = 32 # waiters per resource before new work is shed
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0 # longest wait for a slot before answering 503
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+
+    # Conversation memory: recent turns kept verbatim up to this many (estimated) tokens,
+    # older turns are folded into a running summary by the helper LLM
+    MEMORY_TOKEN_BUDGET: int = 1500
+    MEMORY_SUMMARY_MAX_WORDS: int = 150
+
+    # Answer streaming deadlines; after the first-token deadline a hedged request goes to FALLBACK_LLM_MODEL
+    GENERATION_HEDGING_ENABLED: bool = True
+    GENERATION_FIRST_TOKEN_TIMEOUT_SECONDS: float = 8.0
+    GENERATION_INTER_TOKEN_TIMEOUT_SECONDS: float = 20.0
+
+    # Identical first-turn questions arriving together share one generation
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Knowledge index type: 'flat' (exact) or 'ivf_flat', 'hnsw', 'ivf_pq' (approximate, for large corpora).
+    # Build-time settings apply to the next index version; search settings apply when an index is loaded.
+    KNOWLEDGE_INDEX_TYPE: Literal["flat", "ivf_flat", "hnsw", "ivf_pq"] = "flat"
+    KNOWLEDGE_IVF_NLIST: int = 0 # inverted lists; 0 sizes them from the corpus (about 4·√chunks)
+    KNOWLEDGE_IVF_NPROBE: int = 8 # lists scanned per query
+    KNOWLEDGE_HNSW_M: int = 32 # graph links per vector
+    KNOWLEDGE_HNSW_EF_CONSTRUCTION: int = 64
+    KNOWLEDGE_HNSW_EF_SEARCH: int = 64 # candidates explored per query
+    KNOWLEDGE_PQ_M: int = 16 # sub-quantizers; must divide the embedding dimension (768 for text-embedding-004)
+    KNOWLEDGE_PQ_NBITS: int = 8
+    KNOWLEDGE_TRAINING_SAMPLE: int = 50000 # vectors sampled to train IVF and PQ indexes
+
+    # Multi-tenancy: requests are routed by the X-Tenant-ID header to tenants defined in TENANTS_FILE (JSON);
+    # tenant indexes are loaded on first use and evicted least-recently-used
+    TENANTS_FILE: str | None = None
+    TENANT_INDEX_MEMORY_BUDGET_MB: int = 2048 # loaded indexes per worker, estimated from their size on disk
+    MAX_LOADED_TENANTS: int = 100
+
+    # Startup warm-up: loads the default tenant's index, builds its chains, opens upstream
+    # connections and replays WARMUP_QUESTIONS before /readyz reports the worker ready
+    WARMUP_ENABLED: bool = True # when false, startup only loads the default tenant's index
+    WARMUP_TIMEOUT_SECONDS: float = 20.0 # startup waits this long, then serves while warm-up finishes; keep below the gunicorn worker timeout
+    WARMUP_QUESTIONS: List[str] = [] # JSON list, e.g. ["What projects have you built?"]
+
+    # Knowledge index hot reload: workers poll the published index version and swap it in without a restart
+    KNOWLEDGE_POLL_INTERVAL_SECONDS: float = 10.0 # 0 disables polling
+    KNOWLEDGE_VERSIONS_TO_KEEP: int = 3 # built index versions kept on disk for rollback
+
+    # Chat rate limit: a token bucket per client shared by all workers through the database
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CAPACITY: float = 15 # burst size in tokens
+    RATE_LIMIT_REFILL_PER_MINUTE: float = 15
+    RATE_LIMIT_COST_AUDIO_IN: float = 2 # extra tokens for speech recognition
+    RATE_LIMIT_COST_AUDIO_OUT: float = 2 # extra tokens for speech synthesis
+    RATE_LIMIT_COST_PER_1K_CHARS: float = 1 # extra tokens per full 1000 characters of message
+    RATE_LIMIT_STORAGE_URL: str | None = None # defaults to DATABASE_URL; e.g. sqlite+aiosqlite:///ratelimit.db
+    RATE_LIMIT_POOL_SIZE: int = 2 # the limiter's own connections per worker (plus as many overflow), apart from DB_POOL_SIZE
+    RATE_LIMIT_PRUNE_INTERVAL_SECONDS: float = 600 # deletes buckets idle long enough to be full again; 0 disables
+    TRUSTED_PROXIES: List[str] = [] # IPs/CIDRs whose X-Forwarded-For header is trusted
     
     POSTGRES_SERVER: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
-    DATABASE_URL: PostgresDsn | None = None
+    DATABASE_URL: PostgresDsn | str | None = None # any SQLAlchemy async URL, e.g. sqlite+aiosqlite for benchmarks
+
+    # Connection pool settings (per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0 # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800 # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int | None = 15000
 
     @field_validator("DATABASE_URL", mode='before')
     def assemble_db_connection(cls, v: str | None, info: ValidationInfo) -> any:
@@ -1,23 +1,188 @@
-import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+import threading
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from typing import AsyncGenerator
 from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CHECKOUTS,
+    DB_POOL_CONNECT_DURATION,
+    DB_POOL_OVERFLOW,
+    DB_POOL_OVERFLOW_EVENTS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUTS,
+)
 
-engine = create_async_engine(str(settings.DATABASE_URL), echo=False)
+
+class PoolStats:
+    """
+    Counters describing how this worker's connection pool is used.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_total = 0.0
+
+    def record_checkout(self, wait: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+            if overflowed:
+                self.overflow_events += 1
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKOUT_WAIT.observe(wait)
+        if overflowed:
+            DB_POOL_OVERFLOW_EVENTS.inc()
+
+    def record_timeout(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+        DB_POOL_TIMEOUTS.inc()
+
+    def record_connect(self, duration: float) -> None:
+        with self._lock:
+            self.connects += 1
+            self.connect_total += duration
+        DB_POOL_CONNECT_DURATION.observe(duration)
+
+    def snapshot(self, pool: "InstrumentedAsyncQueuePool") -> dict:
+        with self._lock:
+            return {
+                "pool_size": pool.size(),
+                "max_overflow": pool.max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": (self.checkout_wait_total / self.checkouts * 1000) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": self.checkout_wait_max * 1000,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "connect_avg_ms": (self.connect_total / self.connects * 1000) if self.connects else 0.0,
+            }
+
+
+pool_stats = PoolStats()
+
+# Set on a connection record by the connect events, so a checkout can leave out connect time
+_CONNECT_STARTED = "pool_connect_started"
+_CONNECT_SECONDS = "pool_connect_seconds"
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records checkout wait time, overflow connections and timeouts.
+
+    The wait is measured around `_do_get`, SQLAlchemy's (private) queue checkout; no
+    public event fires before a checkout starts, so requirements.txt pins SQLAlchemy 2.1.
+    Time spent opening a new connection is measured by the connect events installed by
+    `instrument_engine` and left out, so the wait only covers queueing for a connection.
+    """
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        # Kept for reporting; QueuePool only stores it privately
+        self.max_overflow = max_overflow
+
+    def _do_get(self):
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record_timeout(time.perf_counter() - start)
+            raise
+        connect_seconds = record.info.pop(_CONNECT_SECONDS, 0.0)
+        # A checkout overflowed if it had to open a connection while the pool was already full.
+        overflowed = overflow_before >= 0 and self._overflow > overflow_before
+        pool_stats.record_checkout(max(0.0, time.perf_counter() - start - connect_seconds), overflowed)
+        self._update_gauges()
+        return record
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        DB_POOL_CHECKED_OUT.set(self.checkedout())
+        DB_POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Times new connections through the public dialect and pool connect events.
+    """
+    pool = engine.pool
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def _on_do_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info[_CONNECT_STARTED] = time.perf_counter()
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop(_CONNECT_STARTED, None)
+        if started is not None:
+            duration = time.perf_counter() - started
+            connection_record.info[_CONNECT_SECONDS] = duration
+            pool_stats.record_connect(duration)
+
+    DB_POOL_SIZE.set(pool.size())
+
+
+def _engine_options(database_url: str) -> dict:
+    """
+    Builds the engine keyword arguments from the pool settings.
+    """
+    options = {
+        "echo": False,
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS and database_url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        }
+    return options
+
+
+engine = create_async_engine(str(settings.DATABASE_URL), **_engine_options(str(settings.DATABASE_URL)))
+instrument_engine(engine)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to get an async database session.
+    The session is lazy: a pooled connection is only checked out on the first query,
+    so requests that never touch the database do not hold a connection.
     """
     async with async_session() as session:
         yield session
 
+def get_pool_stats() -> dict:
+    """
+    Returns the current connection pool usage for this worker.
+    """
+    return pool_stats.snapshot(engine.pool)
+
 async def init_db():
     """
     Initializes the database by creating all tables.
     """
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,107 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class GenerationTimeout(TimeoutError):
+    """
+    Raised when a stream misses its first-token or inter-token deadline.
+    """
+
+
+async def _close(task: asyncio.Task, iterator: AsyncIterator) -> None:
+    """Cancels a pending read and closes its stream."""
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except BaseException:
+            pass
+
+
+async def hedged_stream(
+    primary: AsyncIterator[T],
+    fallback_factory: Optional[Callable[[], AsyncIterator[T]]],
+    first_token_timeout: Optional[float],
+    inter_token_timeout: Optional[float],
+    on_winner: Optional[Callable[[str], None]] = None,
+) -> AsyncIterator[T]:
+    """
+    Yields the items of `primary`, hedging it with a fallback stream when it is slow to start.
+
+    If `primary` yields nothing within `first_token_timeout`, or fails before its first
+    item, the fallback is started and whichever stream produces a first item wins.
+    The other is cancelled, so only the winner runs to completion. `on_winner`
+    receives "primary", "primary_hedged" or "fallback". After the first item, each
+    further item must arrive within `inter_token_timeout`. Missed deadlines raise
+    GenerationTimeout.
+    """
+    streams: Dict[asyncio.Task, tuple] = {
+        asyncio.ensure_future(primary.__anext__()): ("primary", primary),
+    }
+    hedged = False
+    winner = None
+    first_item = None
+    exhausted = False
+    last_error: Optional[BaseException] = None
+
+    def start_fallback() -> None:
+        fallback = fallback_factory()
+        streams[asyncio.ensure_future(fallback.__anext__())] = ("fallback", fallback)
+
+    try:
+        while streams and winner is None:
+            done, _ = await asyncio.wait(streams.keys(), timeout=first_token_timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if hedged or fallback_factory is None:
+                    raise GenerationTimeout(f"No token within {first_token_timeout}s")
+                hedged = True
+                start_fallback()
+                continue
+
+            for task in done:
+                path, iterator = streams.pop(task)
+                error = task.exception()
+                if error is None or isinstance(error, StopAsyncIteration):
+                    winner = (path, iterator)
+                    exhausted = error is not None
+                    first_item = None if exhausted else task.result()
+                    break
+                last_error = error
+
+            if winner is None and not streams and not hedged and fallback_factory is not None:
+                # The primary failed before its first token: fall back right away
+                hedged = True
+                start_fallback()
+    finally:
+        for task, (_, iterator) in streams.items():
+            await _close(task, iterator)
+
+    if winner is None:
+        raise last_error
+    path, iterator = winner
+    if on_winner is not None:
+        on_winner("primary_hedged" if hedged and path == "primary" else path)
+    if exhausted:
+        return
+
+    try:
+        yield first_item
+        while True:
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), timeout=inter_token_timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise GenerationTimeout(f"No token within {inter_token_timeout}s") from None
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -1,69 +1,274 @@
 import os
+import re
 import glob
+import fcntl
+import time
+import shutil
+import logging
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from uuid import uuid4
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 from app.core.config import settings
+from app.core import ann
 from app.core.knowledge_sources import KNOWLEDGE_SOURCES
+from app.core.tenants import Tenant, DEFAULT_TENANT_ID
 
 STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static')
 DOCS_DIR = os.path.join(STATIC_DIR, "docs")
 VECTOR_STORE_PATH = os.path.join(STATIC_DIR, "faiss_index")
 
+# Index versions live in VECTOR_STORE_PATH/versions/<version>; the CURRENT file names
+# the published one, and every worker polls it to pick up new versions.
+# Other tenants have the same layout under VECTOR_STORE_PATH/tenants/<tenant id>.
+VERSIONS_DIR = "versions"
+TENANTS_DIR = "tenants"
+CURRENT_VERSION_FILE = "CURRENT"
+# Serializes first builds across worker processes
+BUILD_LOCK_FILE = ".build.lock"
+# An index saved directly in VECTOR_STORE_PATH by earlier releases
+LEGACY_VERSION = "legacy"
+_VALID_VERSION = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
 os.makedirs(DOCS_DIR, exist_ok=True)
 
-def get_retriever():
-    """
-    Creates a knowledge base from multiple sources and returns a retriever.
-    """
+logger = logging.getLogger(__name__)
+
+
+def _embeddings(task_type: str) -> GoogleGenerativeAIEmbeddings:
     if not settings.GOOGLE_API_KEY:
         raise RuntimeError("GOOGLE_API_KEY is required to build the retriever.")
-
-    embeddings = GoogleGenerativeAIEmbeddings(
+    return GoogleGenerativeAIEmbeddings(
         model=settings.EMBEDDING_MODEL,
-        task_type="retrieval_query",
+        task_type=task_type,
         google_api_key=settings.GOOGLE_API_KEY
     )
 
-    if os.path.exists(VECTOR_STORE_PATH):
-        vector_store = FAISS.load_local(VECTOR_STORE_PATH, embeddings, allow_dangerous_deserialization=True)
-    else:
-        print("Creating new vector store from knowledge sources...")
-        
-        all_documents = []
-
-        for source in KNOWLEDGE_SOURCES:
-            source_type = source["type"].lower()
-            source_path = source["path"]
-
-            try:
-                print(f"-> Loading from {source_type}: {source_path}")
-                if source_type == 'pdf':
-                    loader = PyPDFLoader(file_path=os.path.join(DOCS_DIR, source_path))
-                    all_documents.extend(loader.load())
-                elif source_type == 'web':
-                    loader = WebBaseLoader(web_path=source_path)
-                    all_documents.extend(loader.load())
-                elif source_type == 'text':
-                    loader = TextLoader(file_path=os.path.join(DOCS_DIR, source_path))
-                    all_documents.extend(loader.load())
-            except Exception as e:
-                print(f"Warning: Could not load source {source_path}. Error: {e}")
-
-        if not all_documents:
-            raise ValueError("Could not load any content from the configured knowledge sources.")
-
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        docs = text_splitter.split_documents(all_documents)
-
-        document_embeddings = GoogleGenerativeAIEmbeddings(
-            model=settings.EMBEDDING_MODEL,
-            task_type="retrieval_document",
-            google_api_key=settings.GOOGLE_API_KEY
-        )
-        vector_store = FAISS.from_documents(docs, document_embeddings)
-        vector_store.save_local(VECTOR_STORE_PATH)
-        print("Vector store created successfully.")
-
-    return vector_store.as_retriever()
\ No newline at end of file
+
+def _is_default(tenant: Optional[Tenant]) -> bool:
+    return tenant is None or tenant.id == DEFAULT_TENANT_ID
+
+
+def get_store_path(tenant: Optional[Tenant] = None) -> str:
+    """Returns the directory holding a tenant's index versions."""
+    if _is_default(tenant):
+        return VECTOR_STORE_PATH
+    return os.path.join(VECTOR_STORE_PATH, TENANTS_DIR, tenant.id)
+
+
+def _docs_dir(tenant: Optional[Tenant]) -> str:
+    if tenant is not None and tenant.docs_dir:
+        return tenant.docs_dir
+    if _is_default(tenant):
+        return DOCS_DIR
+    return os.path.join(STATIC_DIR, TENANTS_DIR, tenant.id, "docs")
+
+
+def get_version_path(version: str, tenant: Optional[Tenant] = None) -> str:
+    """
+    Returns the directory of an index version. Raises ValueError for malformed names.
+    """
+    if version == LEGACY_VERSION and _is_default(tenant):
+        return VECTOR_STORE_PATH
+    if not _VALID_VERSION.match(version):
+        raise ValueError(f"Invalid knowledge version: {version!r}")
+    return os.path.join(get_store_path(tenant), VERSIONS_DIR, version)
+
+
+def version_exists(version: str, tenant: Optional[Tenant] = None) -> bool:
+    try:
+        return os.path.exists(os.path.join(get_version_path(version, tenant), "index.faiss"))
+    except ValueError:
+        return False
+
+
+def version_size_bytes(version: str, tenant: Optional[Tenant] = None) -> int:
+    """The size of an index version on disk, a close estimate of its size once loaded."""
+    path = get_version_path(version, tenant)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in ("index.faiss", "index.pkl") if os.path.exists(os.path.join(path, name)))
+
+
+def list_versions(tenant: Optional[Tenant] = None) -> List[str]:
+    """Lists the built index versions, oldest first."""
+    paths = glob.glob(os.path.join(get_store_path(tenant), VERSIONS_DIR, "*", "index.faiss"))
+    versions = [os.path.basename(os.path.dirname(path)) for path in paths]
+    return sorted(version for version in versions if _VALID_VERSION.match(version))
+
+
+def get_current_version(tenant: Optional[Tenant] = None) -> Optional[str]:
+    """
+    Returns the published index version, or None if no index has been built yet.
+    """
+    try:
+        with open(os.path.join(get_store_path(tenant), CURRENT_VERSION_FILE), encoding="utf-8") as f:
+            version = f.read().strip()
+        if version:
+            return version
+    except FileNotFoundError:
+        pass
+    return LEGACY_VERSION if _is_default(tenant) and version_exists(LEGACY_VERSION) else None
+
+
+def publish_version(version: str, tenant: Optional[Tenant] = None) -> None:
+    """
+    Makes `version` the published index. The pointer file is replaced atomically,
+    so a polling worker never reads a partial name.
+    """
+    if not version_exists(version, tenant):
+        raise ValueError(f"Unknown knowledge version: {version!r}")
+    store_path = get_store_path(tenant)
+    os.makedirs(store_path, exist_ok=True)
+    pointer = os.path.join(store_path, CURRENT_VERSION_FILE)
+    tmp_pointer = f"{pointer}.{uuid4().hex}.tmp"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_pointer, pointer)
+    logger.info(f"Published knowledge version {version} of tenant {tenant.id if tenant else DEFAULT_TENANT_ID}")
+
+
+def _load_documents(tenant: Optional[Tenant] = None) -> list:
+    all_documents = []
+    sources = KNOWLEDGE_SOURCES if tenant is None or tenant.sources is None else tenant.sources
+    docs_dir = _docs_dir(tenant)
+
+    for source in sources:
+        source_type = source["type"].lower()
+        source_path = source["path"]
+
+        try:
+            logger.info(f"-> Loading from {source_type}: {source_path}")
+            if source_type == 'pdf':
+                loader = PyPDFLoader(file_path=os.path.join(docs_dir, source_path))
+                all_documents.extend(loader.load())
+            elif source_type == 'web':
+                loader = WebBaseLoader(web_path=source_path)
+                all_documents.extend(loader.load())
+            elif source_type == 'text':
+                loader = TextLoader(file_path=os.path.join(docs_dir, source_path))
+                all_documents.extend(loader.load())
+        except Exception as e:
+            logger.warning(f"Could not load source {source_path}. Error: {e}")
+
+    if not all_documents:
+        raise ValueError("Could not load any content from the configured knowledge sources.")
+    return all_documents
+
+
+def build_vector_store(docs: List[Document], embeddings: GoogleGenerativeAIEmbeddings) -> FAISS:
+    """
+    Embeds the chunks into an index of type KNOWLEDGE_INDEX_TYPE, training it on a sample first if needed.
+    """
+    vectors = np.array(embeddings.embed_documents([doc.page_content for doc in docs]), dtype=np.float32)
+    index = ann.create_index(
+        vectors.shape[1],
+        len(vectors),
+        settings.KNOWLEDGE_INDEX_TYPE,
+        nlist=settings.KNOWLEDGE_IVF_NLIST,
+        hnsw_m=settings.KNOWLEDGE_HNSW_M,
+        hnsw_ef_construction=settings.KNOWLEDGE_HNSW_EF_CONSTRUCTION,
+        pq_m=settings.KNOWLEDGE_PQ_M,
+        pq_nbits=settings.KNOWLEDGE_PQ_NBITS,
+    )
+    ann.train_index(index, vectors, settings.KNOWLEDGE_TRAINING_SAMPLE)
+    index.add(vectors)
+    logger.info(f"Indexed {len(docs)} chunks with {ann.describe_index(index)}")
+
+    ids = [str(uuid4()) for _ in docs]
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, docs))),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
+def build_index_version(tenant: Optional[Tenant] = None) -> str:
+    """
+    Builds a new index version from the knowledge sources and returns its name.
+    The index is written to a temporary directory and renamed into place, so a
+    version directory is always complete; a failed write leaves nothing behind.
+    Blocking: run it in a thread.
+    """
+    logger.info("Creating new vector store from knowledge sources...")
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    docs = text_splitter.split_documents(_load_documents(tenant))
+    vector_store = build_vector_store(docs, _embeddings("retrieval_document"))
+
+    version = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid4().hex[:8]}"
+    path = get_version_path(version, tenant)
+    tmp_path = os.path.join(os.path.dirname(path), f".{version}.tmp")
+    try:
+        vector_store.save_local(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        # Only left over if saving or renaming failed
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    logger.info(f"Vector store version {version} created successfully.")
+    return version
+
+
+def prune_versions(keep: int, tenant: Optional[Tenant] = None) -> List[str]:
+    """
+    Deletes all but the `keep` newest index versions, never the published one.
+    Workers that have not switched yet keep their index in memory, so this is safe.
+    """
+    current = get_current_version(tenant)
+    versions = list_versions(tenant)
+    removed = [version for version in versions[:max(0, len(versions) - keep)] if version != current]
+    for version in removed:
+        shutil.rmtree(get_version_path(version, tenant), ignore_errors=True)
+    return removed
+
+
+@contextmanager
+def _build_lock(tenant: Optional[Tenant] = None) -> Iterator[None]:
+    """Holds an exclusive lock on the tenant's store directory, shared by all worker processes."""
+    store_path = get_store_path(tenant)
+    os.makedirs(store_path, exist_ok=True)
+    with open(os.path.join(store_path, BUILD_LOCK_FILE), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def ensure_current_version(tenant: Optional[Tenant] = None) -> str:
+    """
+    Returns the published index version, building and publishing a first one if none exists.
+    Workers starting together build it once: the others wait for the lock, then load it.
+    """
+    version = get_current_version(tenant)
+    if version is not None:
+        return version
+    with _build_lock(tenant):
+        version = get_current_version(tenant)
+        if version is None:
+            version = build_index_version(tenant)
+            publish_version(version, tenant)
+    return version
+
+
+def get_retriever(version: Optional[str] = None, tenant: Optional[Tenant] = None):
+    """
+    Returns a retriever over an index version, the published one by default,
+    with the configured search parameters (nprobe, efSearch) applied.
+    """
+    vector_store = FAISS.load_local(
+        get_version_path(version or ensure_current_version(tenant), tenant),
+        _embeddings("retrieval_query"),
+        allow_dangerous_deserialization=True,
+    )
+    ann.set_search_params(
+        vector_store.index,
+        nprobe=settings.KNOWLEDGE_IVF_NPROBE,
+        ef_search=settings.KNOWLEDGE_HNSW_EF_SEARCH,
+    )
+    logger.info(f"Loaded knowledge index: {ann.describe_index(vector_store.index)}")
+    return vector_store.as_retriever()
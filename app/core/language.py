@@ -0,0 +1,96 @@
+import logging
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from langdetect import DetectorFactory, detect_langs, LangDetectException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# langdetect is randomized; a fixed seed makes a message always resolve to the same language
+DetectorFactory.seed = 0
+
+# Languages with prompts and voices: ISO 639-1 code -> (BCP-47 locale, name used in prompts)
+SUPPORTED_LANGUAGES = {
+    "en": ("en-US", "English"),
+    "id": ("id-ID", "Indonesian"),
+}
+# langdetect and some clients still use the legacy ISO code for Indonesian
+_ALIASES = {"in": "id"}
+
+# Only the start of a message is inspected; it is enough to tell the languages apart
+DETECTION_MAX_CHARS = 300
+DETECTION_CACHE_SIZE = 4096
+
+
+class LanguageContext(NamedTuple):
+    """
+    The language of one request, resolved once and used for STT, prompts, cache keys and TTS.
+    `source` records how it was resolved: 'stt', 'detected', 'hint' or 'default'.
+    """
+    code: str
+    source: str
+
+    @property
+    def locale(self) -> str:
+        return SUPPORTED_LANGUAGES[self.code][0]
+
+    @property
+    def name(self) -> str:
+        return SUPPORTED_LANGUAGES[self.code][1]
+
+
+def normalize_language(value: Optional[str]) -> Optional[str]:
+    """
+    Maps a language code or locale ('id-ID', 'en-us', 'in') to a supported
+    ISO 639-1 code, or None if the language is not supported.
+    """
+    if not value:
+        return None
+    code = value.strip().lower().replace("_", "-").split("-")[0]
+    code = _ALIASES.get(code, code)
+    return code if code in SUPPORTED_LANGUAGES else None
+
+
+@lru_cache(maxsize=DETECTION_CACHE_SIZE)
+def _detect(text: str) -> Optional[str]:
+    try:
+        candidates = detect_langs(text)
+    except LangDetectException:
+        return None
+    for candidate in candidates:
+        code = normalize_language(candidate.lang)
+        if code is not None and candidate.prob >= settings.LANGUAGE_DETECTION_MIN_CONFIDENCE:
+            return code
+    return None
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    Detects the supported language a short text is written in, or returns None if
+    unsure. Results are cached, so repeated messages are not analyzed again.
+    """
+    return _detect(" ".join(text.lower().split())[:DETECTION_MAX_CHARS])
+
+
+def resolve_language(
+    hint: Optional[str] = None,
+    message: Optional[str] = None,
+    stt_language_code: Optional[str] = None,
+) -> LanguageContext:
+    """
+    Resolves the language of a request, in order of reliability: the language the
+    speech recognizer heard, the detected language of the user's message, the
+    client's hint, then DEFAULT_LANGUAGE.
+    """
+    code = normalize_language(stt_language_code)
+    if code is not None:
+        return LanguageContext(code, "stt")
+    code = detect_language(message) if message else None
+    if code is not None:
+        return LanguageContext(code, "detected")
+    code = normalize_language(hint)
+    if code is not None:
+        return LanguageContext(code, "hint")
+    return LanguageContext(normalize_language(settings.DEFAULT_LANGUAGE) or "en", "default")
@@ -1,4 +1,229 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import math
+import time
+import asyncio
+import logging
+import ipaddress
+from typing import List, Optional, Tuple
 
-limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
+from fastapi import Request
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.rate_limit import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+# Attempts at the optimistic read-modify-write before giving up (and failing open)
+_MAX_UPDATE_ATTEMPTS = 5
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a client's bucket does not hold enough tokens for a request.
+    """
+    def __init__(self, retry_after: int):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _parse_networks(entries: List[str]) -> List[ipaddress._BaseNetwork]:
+    return [ipaddress.ip_network(entry.strip(), strict=False) for entry in entries if entry.strip()]
+
+
+class TokenBucketLimiter:
+    """
+    Token-bucket rate limiter whose buckets live in a SQL table, so the limit holds
+    across gunicorn workers, replicas and restarts.
+
+    Each client gets RATE_LIMIT_CAPACITY tokens, refilled at RATE_LIMIT_REFILL_PER_MINUTE.
+    A request consumes tokens in proportion to its upstream cost (see `request_cost`).
+    Buckets are updated with an optimistic compare-and-set on `updated_at`, which
+    works the same on PostgreSQL and on the SQLite stand-in used by tests.
+    Buckets idle long enough to be full again are deleted by `prune`, since a
+    missing bucket is a full one.
+
+    The limiter has its own small connection pool (RATE_LIMIT_POOL_SIZE), on
+    `storage_url` or else the main database, so its read-modify-write per chat
+    request never queues behind conversation logging on the main pool.
+    """
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_minute: float,
+        trusted_proxies: List[str],
+        storage_url: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_minute / 60
+        self.trusted_proxies = _parse_networks(trusted_proxies)
+        self.enabled = enabled
+        self._storage_url = storage_url
+        self._session_factory = None
+        self._table_ready = storage_url is None # the main database creates it in init_db()
+
+    def _sessions(self):
+        if self._session_factory is None:
+            engine = create_async_engine(
+                self._storage_url or str(settings.DATABASE_URL),
+                pool_size=settings.RATE_LIMIT_POOL_SIZE,
+                max_overflow=settings.RATE_LIMIT_POOL_SIZE,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+            )
+            self._session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        return self._session_factory
+
+    async def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        async with self._sessions()() as db:
+            connection = await db.connection()
+            await connection.run_sync(
+                lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[RateLimitBucket.__table__])
+            )
+            await db.commit()
+        self._table_ready = True
+
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_key(self, request: Request) -> str:
+        """
+        Returns the client address. X-Forwarded-For is only honoured when the direct
+        peer is a trusted proxy; it is then walked from the right, and the first
+        address that is not itself a trusted proxy is the client.
+        """
+        peer = request.client.host if request.client else "unknown"
+        if not self._is_trusted(peer):
+            return peer
+
+        forwarded = request.headers.get("X-Forwarded-For", "")
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+    def _refill(self, tokens: float, updated_at: float, now: float) -> float:
+        return min(self.capacity, tokens + max(0.0, now - updated_at) * self.refill_per_second)
+
+    def _retry_after(self, tokens: float, cost: float) -> int:
+        if self.refill_per_second <= 0:
+            return 60
+        return max(1, math.ceil((cost - tokens) / self.refill_per_second))
+
+    async def _take(self, db: AsyncSession, key: str, cost: float) -> Tuple[bool, float]:
+        """
+        Tries to take `cost` tokens from the bucket. Returns (allowed, tokens left).
+        """
+        for _ in range(_MAX_UPDATE_ATTEMPTS):
+            now = time.time()
+            row = (await db.execute(
+                select(RateLimitBucket.tokens, RateLimitBucket.updated_at).where(RateLimitBucket.key == key)
+            )).first()
+
+            if row is None:
+                try:
+                    async with db.begin_nested():
+                        db.add(RateLimitBucket(key=key, tokens=self.capacity - cost, updated_at=now))
+                    await db.commit()
+                    return True, self.capacity - cost
+                except IntegrityError:
+                    # Another worker created the bucket first; retry against its row
+                    await db.rollback()
+                    continue
+
+            available = self._refill(row.tokens, row.updated_at, now)
+            if available < cost:
+                await db.rollback()
+                return False, available
+
+            result = await db.execute(
+                update(RateLimitBucket)
+                .where(RateLimitBucket.key == key, RateLimitBucket.updated_at == row.updated_at)
+                .values(tokens=available - cost, updated_at=now)
+            )
+            await db.commit()
+            if result.rowcount == 1:
+                return True, available - cost
+        raise SQLAlchemyError(f"Could not update the rate limit bucket for {key} after {_MAX_UPDATE_ATTEMPTS} attempts")
+
+    async def hit(self, request: Request, cost: float = 1.0) -> None:
+        """
+        Consumes `cost` tokens for the requesting client.
+        Raises RateLimitExceeded when the bucket is short; fails open if the storage is unavailable.
+        """
+        if not self.enabled:
+            return
+        key = self.client_key(request)
+        cost = min(cost, self.capacity)
+        try:
+            await self._ensure_table()
+            async with self._sessions()() as db:
+                allowed, tokens = await self._take(db, key, cost)
+        except SQLAlchemyError as e:
+            logger.warning(f"Rate limit storage unavailable, allowing request: {e}")
+            return
+        if not allowed:
+            raise RateLimitExceeded(self._retry_after(tokens, cost))
+
+
+    async def prune(self) -> int:
+        """
+        Deletes the buckets that have been idle long enough to refill completely and
+        returns how many were deleted. A concurrent hit on a deleted bucket fails its
+        compare-and-set and retries against a fresh, full bucket.
+        """
+        if self.refill_per_second <= 0:
+            return 0
+        cutoff = time.time() - self.capacity / self.refill_per_second
+        await self._ensure_table()
+        async with self._sessions()() as db:
+            result = await db.execute(delete(RateLimitBucket).where(RateLimitBucket.updated_at < cutoff))
+            await db.commit()
+        return result.rowcount
+
+    async def prune_periodically(self, interval: float) -> None:
+        """Prunes idle buckets every `interval` seconds. Runs until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = await self.prune()
+                if removed:
+                    logger.info(f"Pruned {removed} idle rate limit buckets")
+            except SQLAlchemyError as e:
+                logger.warning(f"Could not prune rate limit buckets: {e}")
+
+
+def request_cost(message: Optional[str], audio_in: bool, audio_out: bool) -> float:
+    """
+    Estimates the upstream cost of a chat request in rate-limit tokens:
+    one token for the generation, plus speech recognition, speech synthesis
+    and every full thousand characters of the typed message.
+    """
+    cost = 1.0
+    if audio_in:
+        cost += settings.RATE_LIMIT_COST_AUDIO_IN
+    if audio_out:
+        cost += settings.RATE_LIMIT_COST_AUDIO_OUT
+    if message:
+        cost += (len(message) // 1000) * settings.RATE_LIMIT_COST_PER_1K_CHARS
+    return cost
+
+
+limiter = TokenBucketLimiter(
+    capacity=settings.RATE_LIMIT_CAPACITY,
+    refill_per_minute=settings.RATE_LIMIT_REFILL_PER_MINUTE,
+    trusted_proxies=settings.TRUSTED_PROXIES,
+    storage_url=settings.RATE_LIMIT_STORAGE_URL,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
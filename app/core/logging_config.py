@@ -0,0 +1,44 @@
+import json
+import logging
+import datetime
+
+from app.core.config import settings
+from app.core.tracing import get_request_id
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as single-line JSON objects tagged with the current request ID.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = get_request_id()
+        if request_id:
+            payload["request_id"] = request_id
+        span = getattr(record, "span", None)
+        if span is not None:
+            payload["span"] = span
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging() -> None:
+    """
+    Configures the 'app' logger hierarchy according to LOG_LEVEL and LOG_FORMAT.
+    """
+    handler = logging.StreamHandler()
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = [handler]
+    app_logger.setLevel(settings.LOG_LEVEL.upper())
+    app_logger.propagate = False
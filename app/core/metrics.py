@@ -0,0 +1,137 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Latency buckets (seconds) covering fast local work up to long LLM generations.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+STAGE_DURATION = Histogram(
+    "chat_stage_duration_seconds",
+    "Time spent in each stage of a chat request.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+PROMPT_TOKENS = Histogram(
+    "chat_prompt_tokens",
+    "Prompt size in tokens of each chat model call in the RAG chain.",
+    ["prompt"],
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+TOKENS_STREAMED = Counter(
+    "chat_tokens_streamed_total",
+    "Answer chunks streamed to clients.",
+)
+CACHE_HITS = Counter(
+    "chat_cache_hits_total",
+    "Cache lookups that were served from cache.",
+    ["cache"],
+)
+CACHE_MISSES = Counter(
+    "chat_cache_misses_total",
+    "Cache lookups that had to compute a fresh value.",
+    ["cache"],
+)
+UPSTREAM_ERRORS = Counter(
+    "chat_upstream_errors_total",
+    "Errors raised by upstream services (LLMs, speech APIs, database).",
+    ["service"],
+)
+CHAT_STREAM_ERRORS = Counter(
+    "chat_stream_errors_total",
+    "Chat streams that ended with an error event, by exception type.",
+    ["error"],
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "http_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter.",
+)
+GENERATION_PATH = Counter(
+    "chat_generation_path_total",
+    "Answer streams by the path that produced them: primary, primary_hedged or fallback.",
+    ["path"],
+)
+LANGUAGE_RESOLUTIONS = Counter(
+    "chat_language_total",
+    "Requests by resolved language and how it was resolved: stt, detected, hint or default.",
+    ["language", "source"],
+)
+KNOWLEDGE_RELOADS = Counter(
+    "knowledge_reloads_total",
+    "Knowledge index versions swapped into a worker, by result.",
+    ["result"],
+)
+TENANT_INDEX_EVICTIONS = Counter(
+    "knowledge_tenant_evictions_total",
+    "Tenant knowledge indexes evicted from memory to stay within the budget.",
+)
+WARMUP_DURATION = Histogram(
+    "warmup_stage_duration_seconds",
+    "Time spent in each startup warm-up stage.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds",
+    "Time spent queued for an upstream concurrency slot.",
+    ["resource"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Upstream calls shed by admission control.",
+    ["resource", "reason"],
+)
+
+# Connection pool of this worker; gauges are summed over live workers in multiprocess mode
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size.", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently in use.", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Overflow connections currently open.", multiprocess_mode="livesum")
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts", "Connections checked out.")
+DB_POOL_OVERFLOW_EVENTS = Counter("db_pool_overflow_events", "Checkouts that opened an overflow connection.")
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts", "Checkouts that timed out waiting for a connection.")
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a free pooled connection, excluding connect time.",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CONNECT_DURATION = Histogram(
+    "db_pool_connect_seconds",
+    "Time spent opening a new database connection.",
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """
+    Records the duration of the wrapped block in the stage latency histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Renders all metrics in the Prometheus text format.
+    When PROMETHEUS_MULTIPROC_DIR is set, the metrics of all gunicorn workers are aggregated.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
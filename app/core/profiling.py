@@ -0,0 +1,58 @@
+import os
+import random
+import asyncio
+import logging
+import secrets
+from typing import Optional
+
+from fastapi import Request
+from pyinstrument import Profiler
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile-Key"
+
+
+def should_profile(request: Request) -> bool:
+    """
+    Profiles a request when it carries the profiling header matching PROFILING_API_KEY
+    (off unless set), or when it is picked by PROFILING_SAMPLE_RATE.
+    """
+    header_key = request.headers.get(PROFILE_HEADER)
+    if header_key and settings.PROFILING_API_KEY and secrets.compare_digest(header_key, settings.PROFILING_API_KEY):
+        return True
+    return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def start_profiler() -> Profiler:
+    """
+    Starts a sampling profiler that follows the current request across awaits.
+    """
+    profiler = Profiler(interval=settings.PROFILING_INTERVAL, async_mode="enabled")
+    profiler.start()
+    return profiler
+
+
+def _write_report(profiler: Profiler, request_id: str) -> str:
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILING_DIR, f"{request_id}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(profiler.output_html())
+    return path
+
+
+async def save_profile(profiler: Profiler, request_id: str) -> Optional[str]:
+    """
+    Stops the profiler and writes an HTML report named after the request ID.
+    The report is rendered and written off the event loop.
+    """
+    try:
+        profiler.stop()
+        path = await asyncio.to_thread(_write_report, profiler, request_id)
+        logger.info(f"Saved request profile to {path}")
+        return path
+    except Exception as e:
+        logger.warning(f"Could not save request profile: {e}")
+        return None
@@ -0,0 +1,103 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _StreamFlight(Generic[T]):
+    """
+    Buffers the items of one in-flight stream so late subscribers can replay it from the start.
+    """
+    def __init__(self):
+        self.items: List[T] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._error_traceback = None
+        self._changed = asyncio.Condition()
+
+    async def push(self, item: T) -> None:
+        async with self._changed:
+            self.items.append(item)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None) -> None:
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._error_traceback = error.__traceback__ if error is not None else None
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[T]:
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: index < len(self.items) or self.done)
+                batch = self.items[index:]
+            index += len(batch)
+            for item in batch:
+                yield item
+            if not batch and self.done:
+                if self.error is not None:
+                    # Every subscriber re-raises the same exception; restart from the producer's traceback
+                    raise self.error.with_traceback(self._error_traceback)
+                return
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent work: while a call or stream for a key is in
+    flight, later callers with the same key share its result instead of starting
+    their own. Keys are forgotten as soon as the work finishes, so this is request
+    coalescing, not a cache.
+    """
+    def __init__(self):
+        self._streams: Dict[Hashable, _StreamFlight] = {}
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._producers: Set[asyncio.Task] = set()
+
+    def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[T]]) -> Tuple[AsyncIterator[T], bool]:
+        """
+        Returns an iterator over the stream for `key` and whether this caller started it.
+        The stream runs in its own task, so it completes even if the caller that
+        started it goes away; every subscriber receives every item.
+        """
+        flight = self._streams.get(key)
+        if flight is not None:
+            return flight.subscribe(), False
+
+        flight = _StreamFlight()
+        self._streams[key] = flight
+        producer = asyncio.create_task(self._produce(key, flight, factory()))
+        self._producers.add(producer) # keeps a reference until it finishes
+        producer.add_done_callback(self._producers.discard)
+        return flight.subscribe(), True
+
+    async def _produce(self, key: Hashable, flight: _StreamFlight, source: AsyncIterator[T]) -> None:
+        error = None
+        try:
+            async for item in source:
+                await flight.push(item)
+        except asyncio.CancelledError:
+            error = RuntimeError("The shared stream was cancelled")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            await flight.finish(error)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Awaits the call for `key`, starting it only if none is in flight.
+        A cancelled caller does not cancel the shared call.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key, None) if self._calls.get(key) is done else None)
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._streams) + len(self._calls)
@@ -0,0 +1,125 @@
+import json
+import logging
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.core.config import settings
+from app.core.prompts import HIRING_MANAGER_SYSTEM_PROMPT_TEMPLATE, SYSTEM_PROMPT_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+# Requests without an X-Tenant-ID header are served by this tenant
+DEFAULT_TENANT_ID = "default"
+
+
+class UnknownTenant(LookupError):
+    """
+    Raised when a request names a tenant that is not in the registry.
+    """
+    def __init__(self, tenant_id: str):
+        super().__init__(f"Unknown tenant: {tenant_id}")
+        self.tenant_id = tenant_id
+
+
+class TenantNotProvisioned(LookupError):
+    """
+    Raised when a tenant has no published knowledge index yet. Indexes are built through
+    the admin reload endpoint (or at startup for the default tenant), never by a chat request.
+    """
+    def __init__(self, tenant_id: str):
+        super().__init__(f"Tenant not provisioned: {tenant_id}")
+        self.tenant_id = tenant_id
+
+
+class Tenant(BaseModel):
+    """
+    One portfolio served by this deployment: its knowledge sources, prompts, contact and voice settings.
+    """
+    id: str = Field(pattern=r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+    name: str
+    # Same format as KNOWLEDGE_SOURCES; None (default tenant only) uses KNOWLEDGE_SOURCES
+    sources: Optional[List[Dict[str, str]]] = None
+    # Directory of the tenant's 'pdf' and 'text' sources; defaults to static/tenants/<id>/docs
+    docs_dir: Optional[str] = None
+    # Answer prompts; must contain {context} and {language}
+    system_prompt: str = SYSTEM_PROMPT_TEMPLATE
+    hiring_manager_prompt: str = HIRING_MANAGER_SYSTEM_PROMPT_TEMPLATE
+    contact_email: str
+    email_subject: str = "Job Opportunity Discussion"
+    email_body: str = ""
+    # Names and terms boosted in speech recognition
+    stt_phrases: List[str] = Field(default_factory=list)
+    # TTS voice per language code, e.g. {"en": "en-US-Neural2-D"}; unset languages use the standard voices
+    voices: Dict[str, str] = Field(default_factory=dict)
+
+    @field_validator("system_prompt", "hiring_manager_prompt")
+    @classmethod
+    def check_prompt_variables(cls, v: str) -> str:
+        for variable in ("{context}", "{language}"):
+            if variable not in v:
+                raise ValueError(f"prompt must contain {variable}")
+        return v
+
+    @model_validator(mode="after")
+    def check_sources(self) -> "Tenant":
+        if self.sources is None and self.id != DEFAULT_TENANT_ID:
+            raise ValueError(f"tenant {self.id!r} must define its knowledge sources")
+        return self
+
+
+DEFAULT_TENANT = Tenant(
+    id=DEFAULT_TENANT_ID,
+    name="Fadhil Ahmad Hidayat",
+    contact_email="fadhilhidayat27@gmail.com",
+    email_body="Hello Fadhil,\n\nI came across your portofolio and would like to discuss a potential opportunity. Are you available for a brief chat next week?\n\nBest regards,",
+    stt_phrases=[
+        "Fadhil Ahmad Hidayat",
+        "NutriChef",
+        "LawBot",
+        "Politeknik Harapan Bersama",
+        "React Native",
+        "YOLOv8",
+    ],
+)
+
+
+class TenantRegistry:
+    """
+    The tenants served by this deployment, keyed by ID.
+    """
+    def __init__(self, tenants: List[Tenant]):
+        self._tenants: Dict[str, Tenant] = {DEFAULT_TENANT_ID: DEFAULT_TENANT}
+        for tenant in tenants:
+            self._tenants[tenant.id] = tenant
+
+    def get(self, tenant_id: Optional[str] = None) -> Tenant:
+        tenant = self._tenants.get(tenant_id or DEFAULT_TENANT_ID)
+        if tenant is None:
+            raise UnknownTenant(tenant_id)
+        return tenant
+
+    def __iter__(self):
+        return iter(self._tenants.values())
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+
+def load_tenants(path: Optional[str]) -> TenantRegistry:
+    """
+    Loads the registry from a JSON file holding a list of tenants.
+    A tenant with the ID 'default' replaces the built-in one.
+    """
+    if not path:
+        return TenantRegistry([])
+    with open(path, encoding="utf-8") as f:
+        tenants = [Tenant(**entry) for entry in json.load(f)]
+    logger.info(f"Loaded {len(tenants)} tenants from {path}")
+    return TenantRegistry(tenants)
+
+
+tenants = load_tenants(settings.TENANTS_FILE)
+
+def get_tenant_registry() -> TenantRegistry:
+    return tenants
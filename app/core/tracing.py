@@ -0,0 +1,162 @@
+import os
+import json
+import asyncio
+import time
+import logging
+import threading
+from uuid import uuid4
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.tracing")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A timed unit of work within a request. Spans nest through a context variable,
+    so a span opened inside another one records it as its parent.
+    """
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid4().hex
+        self.request_id = _request_id.get()
+        self.span_id = uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.attributes["error"] = repr(error)
+
+    def end(self) -> None:
+        if self.end_time_ns is None:
+            self.end_time_ns = time.time_ns()
+            _export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time_ns or time.time_ns()
+        return (end - self.start_time_ns) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Serializes the span in the OTLP/JSON layout used by OpenTelemetry file exporters."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": [
+                {"key": k, "value": {"stringValue": str(v)}}
+                for k, v in {"request.id": self.request_id, **self.attributes}.items()
+            ],
+            "status": {"code": 2 if self.status == "error" else 1},
+        }
+
+
+_file_lock = threading.Lock()
+
+
+def _append_line(line: str) -> None:
+    try:
+        with _file_lock:
+            directory = os.path.dirname(settings.TRACING_FILE_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(settings.TRACING_FILE_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        logger.warning(f"Could not write span to {settings.TRACING_FILE_PATH}: {e}")
+
+
+def _export(span: Span) -> None:
+    """
+    Sends a finished span to the configured exporter ('log', 'file' or 'none').
+    File writes are handed to a worker thread when a span ends on the event loop.
+    """
+    if settings.TRACING_EXPORTER == "log":
+        logger.info(f"span {span.name} {span.duration_ms:.1f}ms", extra={"span": span.to_dict()})
+    elif settings.TRACING_EXPORTER == "file":
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": settings.PROJECT_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": [span.to_otlp()]}],
+            }]
+        }, default=str)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _append_line(line)
+        else:
+            loop.run_in_executor(None, _append_line, line)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def set_request_id(request_id: str) -> None:
+    _request_id.set(request_id)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+    """
+    Starts a span without making it current. The caller is responsible for calling end().
+    Used where start and end happen in different callbacks, e.g. LangChain handlers.
+    """
+    return Span(name, parent=parent or _current_span.get(), attributes=attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Opens a span for the wrapped block and makes it the parent of spans opened inside it.
+    """
+    parent = _current_span.get()
+    new_span = Span(name, parent=parent, attributes=attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        new_span.record_error(e)
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # The block was resumed in a different context (e.g. an async generator
+            # finalized by another task); fall back to restoring the parent explicitly.
+            _current_span.set(parent)
+        new_span.end()
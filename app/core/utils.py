@@ -1,7 +1,97 @@
+import os
+import time
+import shutil
 import urllib.parse
+from typing import AsyncIterator, Optional
+
+import aiofiles
+
+# Read size when streaming files from disk
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Synthesized answers are cached under AUDIO_DIR/tts/<sha256>.mp3, named by their content key
+TTS_CACHE_DIR = "tts"
 
 def create_mailto_link(email: str, subject: str, body: str) -> str:
     """
     Creates a URL-encoded mailto link.
     """
     return f"mailto:{email}?subject={urllib.parse.quote(subject)}&body={urllib.parse.quote(body)}"
+
+
+async def iter_file(path: str, start: int = 0, length: Optional[int] = None, chunk_size: int = FILE_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Streams `length` bytes of a file from `start` (to the end if `length` is None) without loading it into memory.
+    """
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            chunk = await f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def get_tts_cache_path(audio_id: str) -> str:
+    """
+    Returns the path of a cached synthesized answer, relative to AUDIO_DIR.
+    """
+    return os.path.join(TTS_CACHE_DIR, f"{audio_id}.mp3")
+
+
+def keep_cached_audio(audio_dir: str, cache_path: str, filename: str) -> str:
+    """
+    Gives a cached synthesized answer a file of its own under `audio_dir`, so pruning the
+    TTS cache cannot delete audio a conversation refers to. Hard-links the cached file,
+    copying it where links are not supported, and returns `filename`.
+    """
+    source = os.path.join(audio_dir, cache_path)
+    target = os.path.join(audio_dir, filename)
+    try:
+        os.link(source, target)
+    except OSError:
+        # Raises FileNotFoundError again if the cached file is gone
+        shutil.copyfile(source, target)
+    return filename
+
+
+def prune_tts_cache(audio_dir: str, max_age_seconds: float, max_bytes: int) -> int:
+    """
+    Deletes the cached answers under `audio_dir` unused for `max_age_seconds`, then the least
+    recently used ones until the cache fits in `max_bytes` (0 disables either limit).
+    Returns how many files were deleted.
+    """
+    directory = os.path.join(audio_dir, TTS_CACHE_DIR)
+    entries = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(".mp3"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        return 0
+
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for mtime, size, path in entries:
+        expired = max_age_seconds > 0 and mtime < cutoff
+        oversized = max_bytes > 0 and total_bytes > max_bytes
+        if not expired and not oversized:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            # Already pruned by another worker
+            pass
+        total_bytes -= size
+    return removed
@@ -0,0 +1,192 @@
+import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.analytics_rollup import AnalyticsRollup, AnalyticsRollupSession
+from app.models.conversation import Conversation
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+# Upper bounds (in characters) of the answer-length histogram buckets.
+ANSWER_LENGTH_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000)
+ANSWER_LENGTH_OVERFLOW = "inf"
+ANSWER_LENGTH_PERCENTILES = (50, 90, 99)
+
+
+def get_bucket_start(timestamp: datetime.datetime, granularity: str) -> datetime.datetime:
+    """
+    Truncates a timestamp to the start of its hourly or daily bucket.
+    """
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported rollup granularity: {granularity}")
+
+
+def get_answer_length_bucket(length: int) -> str:
+    """
+    Returns the histogram bucket label for an answer of the given length.
+    """
+    for upper_bound in ANSWER_LENGTH_BUCKETS:
+        if length <= upper_bound:
+            return str(upper_bound)
+    return ANSWER_LENGTH_OVERFLOW
+
+
+def estimate_percentile(histogram: Dict[str, int], percentile: float) -> Optional[int]:
+    """
+    Estimates a percentile from an answer-length histogram.
+    Returns the upper bound of the bucket containing the percentile, capped at the largest bucket.
+    """
+    total = sum(histogram.values())
+    if total == 0:
+        return None
+
+    threshold = total * percentile / 100
+    cumulative = 0
+    for upper_bound in ANSWER_LENGTH_BUCKETS:
+        cumulative += histogram.get(str(upper_bound), 0)
+        if cumulative >= threshold:
+            return upper_bound
+    return ANSWER_LENGTH_BUCKETS[-1]
+
+
+def _insert(db: AsyncSession, model):
+    """
+    Returns an INSERT supporting ON CONFLICT for the session's database (PostgreSQL or SQLite).
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql_insert(model)
+    if dialect == "sqlite":
+        return sqlite_insert(model)
+    raise NotImplementedError(f"Analytics rollups do not support the {dialect} dialect")
+
+
+async def _mark_session_seen(
+    db: AsyncSession,
+    bucket_starts: Dict[str, datetime.datetime],
+    session_id: str,
+) -> List[str]:
+    """
+    Records a session in each granularity's bucket in one statement.
+    Returns the granularities in which it had not been counted yet.
+    """
+    statement = (
+        _insert(db, AnalyticsRollupSession)
+        .values([
+            {"granularity": granularity, "bucket_start": bucket_start, "session_id": session_id}
+            for granularity, bucket_start in bucket_starts.items()
+        ])
+        .on_conflict_do_nothing(index_elements=["granularity", "bucket_start", "session_id"])
+        .returning(AnalyticsRollupSession.granularity)
+    )
+    result = await db.execute(statement)
+    return list(result.scalars().all())
+
+
+async def update_rollups(db: AsyncSession, conversation: Conversation, intent: Optional[str] = None) -> None:
+    """
+    Folds a newly logged conversation into the hourly and daily rollups and commits the
+    session, so a conversation added but not yet committed is written in the same
+    transaction. Every counter of both granularities is incremented by a single
+    INSERT ... ON CONFLICT DO UPDATE, after one statement recording the session.
+    """
+    bucket_starts = {
+        granularity: get_bucket_start(conversation.timestamp, granularity)
+        for granularity in ROLLUP_GRANULARITIES
+    }
+    new_session_granularities = await _mark_session_seen(db, bucket_starts, conversation.session_id)
+
+    increments = [
+        ("messages", ""),
+        ("answer_length", get_answer_length_bucket(len(conversation.ai_response or ""))),
+    ]
+    if intent:
+        increments.append(("intents", intent))
+    if conversation.user_audio_path:
+        increments.append(("audio_in", ""))
+    if conversation.ai_audio_path:
+        increments.append(("audio_out", ""))
+    if conversation.mailto:
+        increments.append(("mailto", ""))
+
+    rows = [
+        {"granularity": granularity, "bucket_start": bucket_start, "metric": metric, "dimension": dimension, "value": 1}
+        for granularity, bucket_start in bucket_starts.items()
+        for metric, dimension in increments + ([("sessions", "")] if granularity in new_session_granularities else [])
+    ]
+    # A fixed row order makes concurrent upserts lock rows in the same order, so they cannot deadlock.
+    rows.sort(key=lambda row: (row["granularity"], row["metric"], row["dimension"]))
+
+    statement = _insert(db, AnalyticsRollup).values(rows)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start", "metric", "dimension"],
+            set_={"value": AnalyticsRollup.value + statement.excluded.value},
+        )
+    )
+    await db.commit()
+
+
+async def get_rollups(
+    db: AsyncSession,
+    granularity: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> List[dict]:
+    """
+    Retrieves the aggregated buckets in [start, end), oldest first.
+    """
+    result = await db.execute(
+        select(AnalyticsRollup)
+        .where(
+            AnalyticsRollup.granularity == granularity,
+            AnalyticsRollup.bucket_start >= start,
+            AnalyticsRollup.bucket_start < end,
+        )
+        .order_by(AnalyticsRollup.bucket_start)
+    )
+
+    buckets: Dict[datetime.datetime, dict] = {}
+    for row in result.scalars().all():
+        bucket = buckets.setdefault(
+            row.bucket_start,
+            {
+                "granularity": granularity,
+                "bucket_start": row.bucket_start,
+                "message_count": 0,
+                "distinct_sessions": 0,
+                "intents": {},
+                "audio_in": 0,
+                "audio_out": 0,
+                "mailto_conversions": 0,
+                "answer_length_histogram": {},
+            },
+        )
+        if row.metric == "messages":
+            bucket["message_count"] = row.value
+        elif row.metric == "sessions":
+            bucket["distinct_sessions"] = row.value
+        elif row.metric == "intents":
+            bucket["intents"][row.dimension] = row.value
+        elif row.metric == "audio_in":
+            bucket["audio_in"] = row.value
+        elif row.metric == "audio_out":
+            bucket["audio_out"] = row.value
+        elif row.metric == "mailto":
+            bucket["mailto_conversions"] = row.value
+        elif row.metric == "answer_length":
+            bucket["answer_length_histogram"][row.dimension] = row.value
+
+    for bucket in buckets.values():
+        bucket["answer_length_percentiles"] = {
+            f"p{p}": estimate_percentile(bucket["answer_length_histogram"], p)
+            for p in ANSWER_LENGTH_PERCENTILES
+        }
+    return list(buckets.values())
@@ -3,10 +3,12 @@ from sqlalchemy.future import select
 from app.models.conversation import Conversation
 from app.api.v1.schemas.analytics import ConversationCreate
 
-async def create_conversation(db: AsyncSession, conversation: ConversationCreate) -> Conversation:
+async def create_conversation(db: AsyncSession, conversation: ConversationCreate, commit: bool = True) -> Conversation:
     """
     Creates and saves a new conversation log to the database,
     including suggested questions, mailto links, and audio file paths.
+    With `commit=False` the row is only flushed, so the caller can commit it
+    together with other writes.
     """
     db_conversation = Conversation(
         session_id=conversation.session_id,
@@ -18,6 +20,9 @@ async def create_conversation(db: AsyncSession, conversation: ConversationCreate
         ai_audio_path=conversation.ai_audio_path,
     )
     db.add(db_conversation)
+    if not commit:
+        await db.flush()
+        return db_conversation
     await db.commit()
     await db.refresh(db_conversation)
     return db_conversation
@@ -1,25 +1,57 @@
 import os
-from fastapi import FastAPI, Request
+import re
+import asyncio
+import logging
+from uuid import uuid4
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.api.v1.api import api_router
 from app.core.config import settings
 from app.core.database import init_db
-from app.core.limiter import limiter
-from slowapi.middleware import SlowAPIMiddleware 
-from slowapi.errors import RateLimitExceeded
+from app.core.limiter import RateLimitExceeded, limiter
+from app.core.metrics import RATE_LIMIT_REJECTIONS, render_metrics
+from app.core.logging_config import configure_logging
+from app.core import tracing, profiling
+from app.core.admission import AdmissionRejected
+from app.core.tenants import TenantNotProvisioned
+from app.services.chat_service import get_chat_service
+from app.services.audio_service import get_audio_service
+from app.services.warmup import Warmup
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
 
 async def _rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    RATE_LIMIT_REJECTIONS.inc()
     return JSONResponse(
         status_code=429,
-        content={"detail": f"Rate limit exceeded: {exc.detail}"}
+        content={"detail": "Rate limit exceeded, please slow down."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+async def _admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The service is busy, please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+async def _tenant_not_provisioned_handler(request: Request, exc: TenantNotProvisioned):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Tenant not provisioned"},
     )
 
 def create_app() -> FastAPI:
     """
     Creates and configures the FastAPI application.
     """
+    configure_logging()
+
     if settings.ENVIRONMENT == "production":
         app = FastAPI(
             title=settings.PROJECT_NAME,
@@ -33,14 +65,36 @@ def create_app() -> FastAPI:
             openapi_url=f"{settings.API_V1_STR}/openapi.json"
         )
     
-    app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
+    app.add_exception_handler(AdmissionRejected, _admission_rejected_handler)
+    app.add_exception_handler(TenantNotProvisioned, _tenant_not_provisioned_handler)
+
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        """
+        Assigns a request ID, wraps the request in a root span and, when requested, profiles it.
+        """
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid4().hex
+        tracing.set_request_id(request_id)
+
+        profiler = profiling.start_profiler() if profiling.should_profile(request) else None
+        try:
+            with tracing.span("http.request", method=request.method, path=request.url.path) as root_span:
+                response = await call_next(request)
+                root_span.set_attribute("http.status_code", response.status_code)
+        finally:
+            if profiler is not None:
+                await profiling.save_profile(profiler, request_id)
+
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
 
     @app.on_event("startup")
     async def on_startup():
         """
-        Initializes the database when the application starts.
+        Initializes the database, warms the worker up and starts watching for new knowledge index versions.
         """
         if not settings.GOOGLE_API_KEY or not str(settings.GOOGLE_API_KEY).strip():
             raise RuntimeError(
@@ -51,6 +105,41 @@ def create_app() -> FastAPI:
         
         await init_db()
 
+        # Connections are not accepted until startup returns; if warm-up outlasts the
+        # timeout, the worker serves while it finishes and /readyz reports not ready
+        app.state.warmup = Warmup(
+            get_chat_service(),
+            get_audio_service(),
+            settings.WARMUP_QUESTIONS,
+            enabled=settings.WARMUP_ENABLED,
+        )
+        app.state.warmup_task = asyncio.create_task(app.state.warmup.run())
+        _, pending = await asyncio.wait({app.state.warmup_task}, timeout=settings.WARMUP_TIMEOUT_SECONDS)
+        if pending:
+            logger.warning(f"Warm-up still running after {settings.WARMUP_TIMEOUT_SECONDS}s, continuing in the background")
+
+        if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_PRUNE_INTERVAL_SECONDS > 0:
+            app.state.rate_limit_pruner = asyncio.create_task(
+                limiter.prune_periodically(settings.RATE_LIMIT_PRUNE_INTERVAL_SECONDS)
+            )
+
+        if settings.TTS_CACHE_PRUNE_INTERVAL_SECONDS > 0:
+            app.state.tts_cache_pruner = asyncio.create_task(
+                get_audio_service().prune_tts_cache_periodically(settings.TTS_CACHE_PRUNE_INTERVAL_SECONDS)
+            )
+
+        if settings.KNOWLEDGE_POLL_INTERVAL_SECONDS > 0:
+            app.state.knowledge_watcher = asyncio.create_task(
+                get_chat_service().knowledge.watch(settings.KNOWLEDGE_POLL_INTERVAL_SECONDS)
+            )
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        for task_name in ("knowledge_watcher", "warmup_task", "rate_limit_pruner", "tts_cache_pruner"):
+            task = getattr(app.state, task_name, None)
+            if task is not None:
+                task.cancel()
+
     static_files_path = os.path.join(os.path.dirname(__file__), "..", "static")
     app.mount("/static", StaticFiles(directory=static_files_path), name="static")
 
@@ -80,6 +169,27 @@ def create_app() -> FastAPI:
     async def health() -> dict:
         return {"status": "ok"}
 
+    @app.get("/readyz", tags=["Health"])
+    async def ready() -> JSONResponse:
+        """
+        Readiness: 503 until this worker's startup warm-up has finished and its knowledge index is loaded.
+        """
+        warmup = getattr(app.state, "warmup", None)
+        if warmup is None:
+            return JSONResponse(status_code=503, content={"status": "starting"})
+        return JSONResponse(status_code=200 if warmup.ready else 503, content=warmup.report())
+
+    if settings.METRICS_ENABLED:
+        @app.get("/metrics", tags=["Health"], include_in_schema=False)
+        async def metrics(request: Request) -> Response:
+            """
+            Prometheus metrics: per-stage latency histograms and request counters.
+            """
+            if settings.METRICS_API_KEY and request.headers.get("Authorization") != f"Bearer {settings.METRICS_API_KEY}":
+                raise HTTPException(status_code=403, detail="Could not validate credentials")
+            body, content_type = render_metrics()
+            return Response(content=body, media_type=content_type)
+
     return app
 
 app = create_app()
\ No newline at end of file
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from app.core.database import Base
+
+class AnalyticsRollup(Base):
+    """
+    Database model for pre-aggregated analytics counters.
+    Each row holds one metric (optionally split by a dimension such as the intent
+    or an answer-length bucket) for an hourly or daily time bucket.
+    """
+    __tablename__ = "analytics_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "metric", "dimension", name="uq_analytics_rollups_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False, index=True)
+    metric = Column(String, nullable=False)
+    dimension = Column(String, nullable=False, default="")
+    value = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsRollupSession(Base):
+    """
+    Database model recording which sessions were already counted in a time bucket,
+    so distinct sessions can be maintained incrementally.
+    """
+    __tablename__ = "analytics_rollup_sessions"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "session_id", name="uq_analytics_rollup_sessions_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False, index=True)
+    session_id = Column(String, nullable=False)
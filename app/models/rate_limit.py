@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Float
+from app.core.database import Base
+
+class RateLimitBucket(Base):
+    """
+    Database model holding one client's token bucket, shared by all workers and replicas.
+    `updated_at` is a Unix timestamp and doubles as the version for optimistic updates.
+    """
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
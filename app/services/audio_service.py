@@ -1,8 +1,27 @@
+import os
+import asyncio
+import hashlib
+import logging
+from uuid import uuid4
+from typing import Dict, NamedTuple, Optional, Sequence
+import aiofiles
 from google.cloud import speech
 from google.cloud import texttospeech_v1 as texttospeech
 from fastapi import UploadFile, HTTPException
 from google.api_core.client_options import ClientOptions
 from app.core.config import settings
+from app.core.metrics import observe_stage, CACHE_HITS, CACHE_MISSES, UPSTREAM_ERRORS
+from app.core import tracing
+from app.core.admission import admission
+from app.core.singleflight import SingleFlight
+from app.core.utils import get_tts_cache_path, prune_tts_cache
+from app.core.language import SUPPORTED_LANGUAGES, normalize_language
+
+logger = logging.getLogger(__name__)
+
+class Transcription(NamedTuple):
+    text: str
+    language_code: Optional[str] = None # as reported by the recognizer, e.g. 'id-id'
 
 class AudioService:
     """
@@ -20,27 +39,30 @@ class AudioService:
         
         self.stt_client = speech.SpeechAsyncClient(client_options=client_options)
         self.tts_client = texttospeech.TextToSpeechAsyncClient(client_options=client_options)
+        self._tts_flights = SingleFlight()
 
-    async def transcribe_audio(self, audio_bytes: bytes, content_type: str, language: str = "en-US") -> str:
+    async def transcribe_audio(
+        self,
+        audio_bytes: bytes,
+        content_type: str,
+        language: Optional[str] = None,
+        phrases: Sequence[str] = (),
+    ) -> Transcription:
+        """
+        Transcribes a WAV recording. The hinted language is recognized first and the
+        other supported languages as alternatives; the result reports which one was heard.
+        `phrases` (the tenant's names and terms) are boosted.
+        """
         if content_type not in ["audio/wav", "audio/x-wav"]:
             raise HTTPException(status_code=415, detail=f"Unsupported audio format. Please upload a WAV file, not '{content_type}'.")
 
         recognition_audio = speech.RecognitionAudio(content=audio_bytes)
 
-        speech_context = speech.SpeechContext(
-            phrases=[
-                "Fadhil Ahmad Hidayat",
-                "NutriChef",
-                "LawBot",
-                "Politeknik Harapan Bersama",
-                "React Native",
-                "YOLOv8",
-            ],
-            boost=20.0,
-        )
+        speech_context = speech.SpeechContext(phrases=list(phrases), boost=20.0)
         
-        primary = "en-US"
-        alternatives = ["id-ID"]
+        primary_code = normalize_language(language) or normalize_language(settings.DEFAULT_LANGUAGE) or "en"
+        primary = SUPPORTED_LANGUAGES[primary_code][0]
+        alternatives = [locale for code, (locale, _) in SUPPORTED_LANGUAGES.items() if code != primary_code]
 
         recognition_config = speech.RecognitionConfig(
             encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
@@ -48,34 +70,91 @@ class AudioService:
             language_code=primary,
             alternative_language_codes=alternatives,
             enable_automatic_punctuation=True,
-            speech_contexts=[speech_context],
+            speech_contexts=[speech_context] if phrases else [],
         )
 
-        try:
-            response = await self.stt_client.recognize(config=recognition_config, audio=recognition_audio)
-        except Exception as e:
-            print(f"Google STT API Error: {e}")
-            raise HTTPException(status_code=500, detail="Error during audio transcription.")
+        async with admission.slot("stt"):
+            try:
+                with tracing.span("stt.recognize", audio_bytes=len(audio_bytes)), observe_stage("stt"):
+                    response = await self.stt_client.recognize(config=recognition_config, audio=recognition_audio)
+            except Exception as e:
+                UPSTREAM_ERRORS.labels(service="stt").inc()
+                logger.error(f"Google STT API Error: {e}")
+                raise HTTPException(status_code=500, detail="Error during audio transcription.")
 
         if response and response.results:
-            return response.results[0].alternatives[0].transcript
-        return ""
+            result = response.results[0]
+            return Transcription(result.alternatives[0].transcript, result.language_code or None)
+        return Transcription("")
+
+    @staticmethod
+    def _select_voice(language: str, voices: Optional[Dict[str, str]] = None):
+        code = normalize_language(language) or 'en'
+        if voices and code in voices:
+            return SUPPORTED_LANGUAGES[code][0], voices[code] # a tenant's own voice
+        if code == 'id':
+            return 'id-ID', 'id-ID-Standard-A' # standard Indonesian female voice
+        return 'en-US', 'en-US-Standard-J' # standard English male voice
 
-    async def synthesize_speech(self, text: str, language: str = "en-US") -> bytes:
+    async def synthesize_speech(self, text: str, language: str = "en-US", voices: Optional[Dict[str, str]] = None) -> bytes:
         synthesis_input = texttospeech.SynthesisInput(text=text)
 
-        if language.lower().startswith('id'):
-            lang_code = 'id-ID'
-            voice_name = 'id-ID-Standard-A' # standard Indonesian female voice
-        else:
-            lang_code = 'en-US'
-            voice_name = 'en-US-Standard-J' # standard English male voice
+        lang_code, voice_name = self._select_voice(language, voices)
 
         voice = texttospeech.VoiceSelectionParams(language_code=lang_code, name=voice_name)
         audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
-        response = await self.tts_client.synthesize_speech(input=synthesis_input, voice=voice, audio_config=audio_config)
+        async with admission.slot("tts"):
+            try:
+                with tracing.span("tts.synthesize", characters=len(text), language=lang_code), observe_stage("tts"):
+                    response = await self.tts_client.synthesize_speech(input=synthesis_input, voice=voice, audio_config=audio_config)
+            except Exception:
+                UPSTREAM_ERRORS.labels(service="tts").inc()
+                raise
         return response.audio_content
 
+    async def synthesize_to_cache(self, text: str, language: str = "en-US", voices: Optional[Dict[str, str]] = None) -> str:
+        """
+        Synthesizes `text` into the content-addressed TTS cache and returns its audio ID.
+        The same text and voice are only synthesized once; the ID doubles as the ETag.
+        `voices` maps language codes to a tenant's own voices.
+        """
+        lang_code, voice_name = self._select_voice(language, voices)
+        audio_id = hashlib.sha256(f"{lang_code}|{voice_name}|{text}".encode("utf-8")).hexdigest()
+        path = os.path.join(settings.AUDIO_DIR, get_tts_cache_path(audio_id))
+        try:
+            # A hit refreshes the modification time, which the cache pruning treats as last use
+            os.utime(path)
+            CACHE_HITS.labels(cache="tts").inc()
+            return audio_id
+        except FileNotFoundError:
+            pass
+
+        async def synthesize_and_store() -> str:
+            CACHE_MISSES.labels(cache="tts").inc()
+            audio = await self.synthesize_speech(text, language=language, voices=voices)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary name first so readers never see a partial file
+            temporary_path = f"{path}.{uuid4().hex}.tmp"
+            async with aiofiles.open(temporary_path, "wb") as f:
+                await f.write(audio)
+            os.replace(temporary_path, path)
+            return audio_id
+
+        return await self._tts_flights.do(audio_id, synthesize_and_store)
+
+    async def prune_tts_cache_periodically(self, interval: float) -> None:
+        """Prunes the TTS cache every `interval` seconds. Runs until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = await asyncio.to_thread(
+                    prune_tts_cache, settings.AUDIO_DIR, settings.TTS_CACHE_MAX_AGE_SECONDS, settings.TTS_CACHE_MAX_BYTES
+                )
+                if removed:
+                    logger.info(f"Pruned {removed} cached TTS answers")
+            except OSError as e:
+                logger.warning(f"Could not prune the TTS cache: {e}")
+
 audio_service = AudioService()
 
 def get_audio_service() -> AudioService:
@@ -0,0 +1,96 @@
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from app.core import tracing
+from app.core.metrics import PROMPT_TOKENS, STAGE_DURATION, UPSTREAM_ERRORS
+from app.services.memory import message_tokens
+
+
+def _is_cancellation(error: Optional[BaseException]) -> bool:
+    return isinstance(error, (asyncio.CancelledError, GeneratorExit))
+
+
+class StageTimingCallbackHandler(AsyncCallbackHandler):
+    """
+    Times the stages inside the RAG chain and records them as tracing spans.
+    A chat model call that starts before retrieval is the history-aware query rewrite;
+    the call after retrieval is the answer itself, whose latency metrics the stream manager records.
+    Failed model calls are counted as upstream errors of `service`; calls cancelled because
+    a hedged stream lost the race are not errors.
+    """
+    def __init__(self, service: str = "main_llm"):
+        self.service = service
+        self._runs: Dict[UUID, Tuple[Optional[str], float, tracing.Span]] = {}
+        self._prompts: Dict[UUID, Tuple[str, int]] = {}
+        self._retrieval_done = False
+        self._parent_span = tracing.current_span()
+
+    def _start(self, run_id: UUID, span_name: str, stage: Optional[str] = None) -> None:
+        span = tracing.start_span(span_name, parent=self._parent_span)
+        self._runs[run_id] = (stage, time.perf_counter(), span)
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        stage, start, span = run
+        if stage is not None:
+            STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+        if _is_cancellation(error):
+            span.set_attribute("cancelled", True)
+        elif error is not None:
+            span.record_error(error)
+        span.end()
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        if self._retrieval_done:
+            self._start(run_id, "llm.answer")
+            prompt = "answer"
+        else:
+            self._start(run_id, "llm.query_rewrite", stage="query_rewrite")
+            prompt = "query_rewrite"
+        self._prompts[run_id] = (prompt, message_tokens(messages[0]) if messages else 0)
+
+    async def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._record_prompt_tokens(run_id, response)
+        self._finish(run_id)
+
+    def _record_prompt_tokens(self, run_id: UUID, response: Any) -> None:
+        """Records the prompt size, preferring the model's reported usage over the estimate."""
+        prompt, tokens = self._prompts.pop(run_id, (None, 0))
+        if prompt is None:
+            return
+        try:
+            usage = response.generations[0][0].message.usage_metadata or {}
+            tokens = usage.get("input_tokens") or tokens
+        except (AttributeError, IndexError):
+            pass
+        PROMPT_TOKENS.labels(prompt=prompt).observe(tokens)
+        run = self._runs.get(run_id)
+        if run is not None:
+            run[2].set_attribute("prompt_tokens", tokens)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._prompts.pop(run_id, None)
+        self._finish(run_id, error)
+        if not _is_cancellation(error):
+            UPSTREAM_ERRORS.labels(service=self.service).inc()
+
+    async def on_retriever_start(self, serialized: Dict[str, Any], query: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "retriever.search", stage="retrieval")
+
+    async def on_retriever_end(self, documents: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is not None:
+            run[2].set_attribute("documents", len(documents))
+        self._finish(run_id)
+        self._retrieval_done = True
+
+    async def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error)
+        if not _is_cancellation(error):
+            UPSTREAM_ERRORS.labels(service="embeddings").inc()
@@ -1,13 +1,14 @@
 import os
 import json
 import threading
+import functools
 import asyncio
+import logging
 import aiofiles
 from uuid import uuid4
 from typing import Dict, List, Optional, AsyncGenerator
 
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain.chains import create_history_aware_retriever, create_retrieval_chain
@@ -15,16 +16,27 @@ from langchain.chains.combine_documents import create_stuff_documents_chain
 
 from app.core.config import settings
 from app.core.database import async_session
-from app.core.knowledge import get_retriever
+from app.core.metrics import observe_stage, CACHE_HITS, CACHE_MISSES, UPSTREAM_ERRORS
+from app.core.admission import admission, AdmissionRejected, Priority
+from app.core.singleflight import SingleFlight
+from app.core.language import LanguageContext
+from app.core.tenants import Tenant, DEFAULT_TENANT_ID, get_tenant_registry
+from app.core import tracing
+from app.core.utils import keep_cached_audio
 from app.api.v1.schemas.chat import UserIntent
 from app.core.prompts import (
     SUGGESTED_QUESTIONS_PROMPT_TEMPLATE,
     INTENT_CLASSIFICATION_PROMPT_TEMPLATE,
     CONTEXTUALIZE_Q_SYSTEM_PROMPT,
+    CONVERSATION_SUMMARY_PROMPT_TEMPLATE,
 )
-from app.crud import crud_conversation
+from app.crud import crud_conversation, crud_analytics
 from app.api.v1.schemas.analytics import ConversationCreate
 from app.services.stream_manager import _ChatStreamManager
+from app.services.memory import BudgetedChatMessageHistory
+from app.services.knowledge_registry import KnowledgeRegistry, TenantKnowledge
+
+logger = logging.getLogger(__name__)
 
 class ChatService:
     """
@@ -32,21 +44,33 @@ class ChatService:
     Delegates stream processing to _ChatStreamManager for cleaner execution.
     """
     def __init__(self):
-        self.store: Dict[str, ChatMessageHistory] = {}
+        self.store: Dict[str, BudgetedChatMessageHistory] = {}
         self._store_lock: threading.RLock = threading.RLock()
 
-        self.chain_cache: Dict[str, RunnableWithMessageHistory] = {}
+        # Each tenant's chains are cached with its loaded index, see TenantKnowledge
         self._chain_cache_lock: threading.RLock = threading.RLock()
 
         self._session_locks: Dict[str, asyncio.Lock] = {}
         self._session_locks_guard: threading.RLock = threading.RLock()
 
+        # Coalesces identical in-flight intent, answer and suggestion calls
+        self.flights = SingleFlight()
+
         self.UserIntent = UserIntent
 
         self.llm = None
-        self.retriever = None
+        self.fallback_llm = None
         self.helper_llm = None
 
+        # Tenants' knowledge indexes, loaded on first use (the default tenant's by the startup
+        # warm-up) and evicted least-recently-used
+        self.tenants = get_tenant_registry()
+        self.knowledge = KnowledgeRegistry(
+            self.tenants,
+            memory_budget_bytes=settings.TENANT_INDEX_MEMORY_BUDGET_MB * 2**20,
+            max_loaded=settings.MAX_LOADED_TENANTS,
+        )
+
         if settings.GOOGLE_API_KEY:
             # The main, powerful LLM for generating high-quality answers
             self.llm = ChatGoogleGenerativeAI(
@@ -60,21 +84,71 @@ class ChatService:
                 google_api_key=settings.GOOGLE_API_KEY,
                 temperature=0,
             )
-            try:
-                self.retriever = get_retriever()
-            except Exception as e:
-                print(f"Error initializing retriever: {e}")
+            # A faster model that answers when the main LLM is slow to start streaming
+            self.fallback_llm = ChatGoogleGenerativeAI(
+                model=settings.FALLBACK_LLM_MODEL or settings.HELPER_LLM_MODEL,
+                google_api_key=settings.GOOGLE_API_KEY,
+                temperature=0.3,
+            )
         else:
             self.llm = None
             self.helper_llm = None
-            self.retriever = None
+            self.fallback_llm = None
+
+    @staticmethod
+    def session_key(tenant_id: str, session_id: str) -> str:
+        """Scopes a session to its tenant, so tenants never share a conversation."""
+        return session_id if tenant_id == DEFAULT_TENANT_ID else f"{tenant_id}/{session_id}"
+
+    @staticmethod
+    def session_tenant_id(session_key: str) -> str:
+        """Returns the tenant of a key built by `session_key`; tenant IDs contain no '/'."""
+        tenant_id, separator, _ = session_key.partition("/")
+        return tenant_id if separator else DEFAULT_TENANT_ID
 
-    def get_session_history(self, session_id: str) -> ChatMessageHistory:
+    def get_session_history(self, session_id: str) -> BudgetedChatMessageHistory:
         with self._store_lock:
             if session_id not in self.store:
-                self.store[session_id] = ChatMessageHistory()
+                tenant = self.tenants.get(self.session_tenant_id(session_id))
+                self.store[session_id] = BudgetedChatMessageHistory(
+                    token_budget=settings.MEMORY_TOKEN_BUDGET,
+                    summarize=functools.partial(self._summarize_history, tenant=tenant),
+                )
             return self.store[session_id]
 
+    async def _summarize_history(self, history: BudgetedChatMessageHistory, tenant: Tenant) -> None:
+        """
+        Folds a session's evicted turns into its running summary using the helper LLM.
+        Runs in the background at low priority, so answers never wait for it.
+        The summary is framed around the tenant whose portfolio the session belongs to.
+        """
+        if not self.helper_llm:
+            return
+
+        prompt = ChatPromptTemplate.from_template(CONVERSATION_SUMMARY_PROMPT_TEMPLATE)
+        chain = prompt | self.helper_llm
+        generation = history.generation
+        while history.pending and history.generation == generation:
+            folded = list(history.pending)
+            new_lines = "\n".join(
+                f"{'User' if message.type == 'human' else 'Assistant'}: {message.content}" for message in folded
+            )
+            with tracing.span("memory.summarize", turns=len(folded) // 2):
+                async with admission.slot("helper_llm", Priority.LOW):
+                    with observe_stage("summarize"):
+                        # Started from inside the chain's history callback; don't inherit its callbacks
+                        response = await chain.ainvoke(
+                            {
+                                "summary": history.summary or "(none)",
+                                "new_lines": new_lines,
+                                "max_words": settings.MEMORY_SUMMARY_MAX_WORDS,
+                                "owner_name": tenant.name,
+                            },
+                            config={"callbacks": []},
+                        )
+            if not history.apply_summary(response.content.strip(), folded, generation):
+                return # the history was cleared meanwhile
+
     def get_session_lock(self, session_id: str) -> asyncio.Lock:
         """Return an asyncio lock that serializes access to a session's chat history."""
         with self._session_locks_guard:
@@ -84,7 +158,7 @@ class ChatService:
                 self._session_locks[session_id] = lock
             return lock
 
-    def _build_rag_chain(self, system_prompt: str) -> RunnableWithMessageHistory:
+    def _build_rag_chain(self, system_prompt: str, llm: ChatGoogleGenerativeAI, retriever) -> RunnableWithMessageHistory:
         """
         Constructs the complete LangChain RAG chain using a direct multilingual retriever.
         """
@@ -96,13 +170,13 @@ class ChatService:
             ]
         )
         history_aware_retriever = create_history_aware_retriever(
-            self.llm, self.retriever, contextualize_q_prompt
+            llm, retriever, contextualize_q_prompt
         )
 
         qa_prompt = ChatPromptTemplate.from_messages(
             [("system", system_prompt), MessagesPlaceholder("chat_history"), ("human", "{input}")]
         )
-        question_answer_chain = create_stuff_documents_chain(self.llm, qa_prompt)
+        question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
         
         rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
 
@@ -114,18 +188,26 @@ class ChatService:
             output_messages_key="answer",
         )
 
-    def get_rag_chain(self, system_prompt: str) -> RunnableWithMessageHistory:
-        """Returns a cached RAG chain for the given system prompt."""
-        if not self.llm or not self.retriever:
+    def get_rag_chain(self, tenant_knowledge: TenantKnowledge, system_prompt: str, fallback: bool = False) -> RunnableWithMessageHistory:
+        """
+        Returns a cached RAG chain over a tenant's loaded index for the given system prompt,
+        on the main or the fallback LLM.
+        """
+        llm = self.fallback_llm if fallback else self.llm
+        if not llm or not tenant_knowledge.retriever:
             raise RuntimeError("LLM or retriever not initialized")
-        chain = self.chain_cache.get(system_prompt)
+        key = (system_prompt, fallback)
+        chain = tenant_knowledge.chain_cache.get(key)
         if chain is not None:
+            CACHE_HITS.labels(cache="rag_chain").inc()
             return chain
         with self._chain_cache_lock:
-            chain = self.chain_cache.get(system_prompt)
+            chain = tenant_knowledge.chain_cache.get(key)
             if chain is None:
-                chain = self._build_rag_chain(system_prompt)
-                self.chain_cache[system_prompt] = chain
+                CACHE_MISSES.labels(cache="rag_chain").inc()
+                chain = self._build_rag_chain(system_prompt, llm, tenant_knowledge.retriever)
+                tenant_knowledge.chain_cache[key] = chain
+                self.knowledge.stats_for(tenant_knowledge.tenant.id).chain_builds += 1
             return chain
 
     def _basic_intent_classification(self, message: str) -> UserIntent:
@@ -144,33 +226,45 @@ class ChatService:
         prompt = ChatPromptTemplate.from_template(INTENT_CLASSIFICATION_PROMPT_TEMPLATE)
         chain = prompt | self.helper_llm
         try:
-            response = await chain.ainvoke({"question": message})
+            # Intent gates the whole request, so it is admitted ahead of answer generation
+            async with admission.slot("helper_llm", Priority.HIGH):
+                with observe_stage("intent"):
+                    response = await chain.ainvoke({"question": message})
             intent_str = response.content.strip().lower()
             if "create_email" in intent_str:
                 return UserIntent.CREATE_EMAIL
             if "recruiter" in intent_str:
                 return UserIntent.RECRUITER
             return UserIntent.GENERAL_INQUIRY
+        except AdmissionRejected:
+            return self._basic_intent_classification(message)
         except Exception as e:
-            print(f"Error classifying user intent: {e}")
+            UPSTREAM_ERRORS.labels(service="helper_llm").inc()
+            logger.warning(f"Error classifying user intent: {e}")
             return self._basic_intent_classification(message)
 
-    async def _generate_suggested_questions(self, question: str, answer: str) -> Optional[List[str]]:
+    async def _generate_suggested_questions(self, question: str, answer: str, language: str = "English") -> Optional[List[str]]:
         if not self.helper_llm:
             return None
 
         prompt = ChatPromptTemplate.from_template(SUGGESTED_QUESTIONS_PROMPT_TEMPLATE)
         chain = prompt | self.helper_llm
         try:
-            response = await chain.ainvoke({"question": question, "answer": answer})
+            # Suggestions are optional, so they are the first helper work to be shed
+            async with admission.slot("helper_llm", Priority.LOW):
+                with observe_stage("suggested_questions"):
+                    response = await chain.ainvoke({"question": question, "answer": answer, "language": language})
             content = response.content
             cleaned_content = content.strip().lstrip("```json").lstrip("```").rstrip("```")
             suggestions = json.loads(cleaned_content)
             if isinstance(suggestions, list) and all(isinstance(q, str) for q in suggestions):
                 return suggestions
             return None
+        except AdmissionRejected:
+            return None
         except Exception as e:
-            print(f"Error parsing suggested questions JSON: {e}")
+            UPSTREAM_ERRORS.labels(service="helper_llm").inc()
+            logger.warning(f"Error parsing suggested questions JSON: {e}")
             return None
 
     async def log_conversation_task(
@@ -181,10 +275,14 @@ class ChatService:
         suggested_questions: Optional[List[str]],
         mailto: Optional[str] = None,
         user_audio_bytes: Optional[bytes] = None,
-        ai_audio_bytes: Optional[bytes] = None,
+        intent: Optional[str] = None,
+        ai_audio_cache_path: Optional[str] = None,
     ):
         """
-        This background task saves audio files and logs the full conversation to the DB.
+        This background task saves audio files, logs the full conversation to the DB
+        and folds it into the hourly/daily analytics rollups.
+        `ai_audio_cache_path` (relative to AUDIO_DIR) is the answer's audio in the TTS cache;
+        the conversation keeps its own link to it, which cache pruning leaves alone.
         """
         user_audio_path = None
         ai_audio_path = None
@@ -198,20 +296,15 @@ class ChatService:
             return filename
 
         try:
-            save_tasks = []
-            if user_audio_bytes:
-                save_tasks.append(save_audio(user_audio_bytes, "wav"))
-            if ai_audio_bytes:
-                save_tasks.append(save_audio(ai_audio_bytes, "mp3"))
-            
-            results = await asyncio.gather(*save_tasks)
-            
-            path_idx = 0
             if user_audio_bytes:
-                user_audio_path = results[path_idx]
-                path_idx += 1
-            if ai_audio_bytes:
-                ai_audio_path = results[path_idx]
+                user_audio_path = await save_audio(user_audio_bytes, "wav")
+            if ai_audio_cache_path:
+                try:
+                    ai_audio_path = await asyncio.to_thread(
+                        keep_cached_audio, settings.AUDIO_DIR, ai_audio_cache_path, f"{session_id}_{uuid4()}.mp3"
+                    )
+                except FileNotFoundError:
+                    logger.warning(f"Cached answer audio {ai_audio_cache_path} was pruned before it could be logged")
 
             conversation_data = ConversationCreate(
                 session_id=session_id,
@@ -222,23 +315,33 @@ class ChatService:
                 user_audio_path=user_audio_path,
                 ai_audio_path=ai_audio_path,
             )
-            async with async_session() as db:
-                await crud_conversation.create_conversation(db, conversation_data)
+            with tracing.span("db.log_conversation"), observe_stage("db_log"):
+                async with async_session() as db:
+                    # The conversation and its rollups are committed in one transaction
+                    db_conversation = await crud_conversation.create_conversation(db, conversation_data, commit=False)
+                    await crud_analytics.update_rollups(db, db_conversation, intent=intent)
         except Exception as e:
-            print(f"Error in background logging task: {e}")
+            UPSTREAM_ERRORS.labels(service="database").inc()
+            logger.exception(f"Error in background logging task: {e}")
 
     async def stream_response(
         self,
         session_id: str,
         message: str,
+        language: Optional[LanguageContext] = None,
+        tenant: Optional[Tenant] = None,
     ) -> AsyncGenerator[str, None]:
         """
         Initializes and runs the stream manager for a chat request.
         Logging is now handled by a background task in the API endpoint.
+        Without a resolved `language`, it is detected from the message.
+        Without a `tenant`, the default tenant answers.
         """
-        manager = _ChatStreamManager(self, session_id, message)
-        async for event in manager.process():
-            yield event
+        tenant = tenant or self.tenants.get(DEFAULT_TENANT_ID)
+        manager = _ChatStreamManager(self, session_id, message, language=language, tenant=tenant)
+        with tracing.span("chat.stream_response", session_id=session_id, tenant=tenant.id):
+            async for event in manager.process():
+                yield event
 
 
 chat_service = ChatService()
@@ -0,0 +1,233 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+from app.core import knowledge, tracing
+from app.core.config import settings
+from app.core.metrics import KNOWLEDGE_RELOADS, TENANT_INDEX_EVICTIONS
+from app.core.singleflight import SingleFlight
+from app.core.tenants import Tenant, TenantNotProvisioned, TenantRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class TenantKnowledge:
+    """
+    One loaded index version of a tenant, with the RAG chains bound to its retriever.
+    A reload installs a new instance; requests holding the old one finish on it.
+    """
+    def __init__(self, tenant: Tenant, version: str, retriever: Any, memory_bytes: int):
+        self.tenant = tenant
+        self.version = version
+        self.retriever = retriever
+        self.memory_bytes = memory_bytes
+        self.chain_cache: Dict[Tuple[str, bool], RunnableWithMessageHistory] = {}
+
+
+class TenantStats:
+    """Per-tenant counters for this worker; kept when the tenant's index is evicted."""
+    def __init__(self):
+        self.requests = 0
+        self.index_loads = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.chain_builds = 0
+        self.last_load_seconds: Optional[float] = None
+        self.last_used: Optional[float] = None
+
+
+class KnowledgeRegistry:
+    """
+    Loads tenants' knowledge indexes on first use and keeps the most recently used
+    ones in memory, within `memory_budget_bytes` and `max_loaded` tenants.
+    Loading, reloading and rebuilding run off the event loop.
+    """
+    def __init__(self, tenants: TenantRegistry, memory_budget_bytes: int, max_loaded: int):
+        self.tenants = tenants
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_loaded = max_loaded
+        self._loaded: "OrderedDict[str, TenantKnowledge]" = OrderedDict()
+        self._loads = SingleFlight()
+        self._reload_locks: Dict[str, asyncio.Lock] = {}
+        self._builds: Dict[str, asyncio.Task] = {}
+        self.build_errors: Dict[str, Optional[str]] = {}
+        self.stats: Dict[str, TenantStats] = {}
+
+    def stats_for(self, tenant_id: str) -> TenantStats:
+        if tenant_id not in self.stats:
+            self.stats[tenant_id] = TenantStats()
+        return self.stats[tenant_id]
+
+    def _reload_lock(self, tenant_id: str) -> asyncio.Lock:
+        if tenant_id not in self._reload_locks:
+            self._reload_locks[tenant_id] = asyncio.Lock()
+        return self._reload_locks[tenant_id]
+
+    def peek(self, tenant_id: str) -> Optional[TenantKnowledge]:
+        """Returns a tenant's loaded knowledge without loading it or marking it as used."""
+        return self._loaded.get(tenant_id)
+
+    def loaded(self) -> List[TenantKnowledge]:
+        return list(self._loaded.values())
+
+    def memory_bytes(self) -> int:
+        return sum(entry.memory_bytes for entry in self._loaded.values())
+
+    def _open(self, tenant: Tenant, version: Optional[str] = None) -> TenantKnowledge:
+        """
+        Loads an index version, the published one by default. Never builds one, since it
+        runs on the request path in every worker. Blocking.
+        """
+        started_at = time.perf_counter()
+        version = version or knowledge.get_current_version(tenant)
+        if version is None:
+            raise TenantNotProvisioned(tenant.id)
+        retriever = knowledge.get_retriever(version, tenant)
+        entry = TenantKnowledge(tenant, version, retriever, knowledge.version_size_bytes(version, tenant))
+        stats = self.stats_for(tenant.id)
+        stats.index_loads += 1
+        stats.last_load_seconds = round(time.perf_counter() - started_at, 3)
+        return entry
+
+    def _install(self, entry: TenantKnowledge) -> None:
+        self._loaded[entry.tenant.id] = entry
+        self._loaded.move_to_end(entry.tenant.id)
+        self._evict(keep=entry.tenant.id)
+
+    def _evict(self, keep: str) -> None:
+        """Drops least recently used tenants until the loaded indexes fit the budget."""
+        while len(self._loaded) > 1 and (
+            len(self._loaded) > self.max_loaded or self.memory_bytes() > self.memory_budget_bytes
+        ):
+            tenant_id = next(tenant_id for tenant_id in self._loaded if tenant_id != keep)
+            entry = self._loaded.pop(tenant_id)
+            self.stats_for(tenant_id).evictions += 1
+            TENANT_INDEX_EVICTIONS.inc()
+            logger.info(f"Evicted knowledge of tenant {tenant_id} ({entry.memory_bytes / 2**20:.1f} MB)")
+
+    async def get(self, tenant: Tenant) -> TenantKnowledge:
+        """
+        Returns a tenant's loaded knowledge, loading it on first use.
+        Concurrent requests for a tenant that is not loaded share one load.
+        Raises TenantNotProvisioned if the tenant has no published index.
+        """
+        stats = self.stats_for(tenant.id)
+        stats.requests += 1
+        stats.last_used = time.time()
+        entry = self._loaded.get(tenant.id)
+        if entry is not None:
+            self._loaded.move_to_end(tenant.id)
+            return entry
+        return await self._loads.do(("load", tenant.id), lambda: self._load(tenant))
+
+    async def provision(self, tenant: Tenant) -> TenantKnowledge:
+        """
+        Loads a tenant's knowledge, building and publishing a first index version if it
+        has none. Used at startup, off the request path.
+        """
+        version = await asyncio.to_thread(knowledge.ensure_current_version, tenant)
+        entry = self._loaded.get(tenant.id)
+        if entry is not None and entry.version == version:
+            return entry
+        return await self._loads.do(("load", tenant.id), lambda: self._load(tenant))
+
+    async def _load(self, tenant: Tenant) -> TenantKnowledge:
+        with tracing.span("knowledge.load", tenant=tenant.id):
+            entry = await asyncio.to_thread(self._open, tenant)
+        self._install(entry)
+        return entry
+
+    async def reload(self, tenant: Tenant, version: Optional[str] = None, publish: bool = False) -> str:
+        """
+        Loads an index version of a tenant (the published one by default) and swaps it in.
+        With `publish`, the version is published once it has loaded, so other workers
+        never poll a version that cannot be loaded.
+        """
+        async with self._reload_lock(tenant.id):
+            version = version or await asyncio.to_thread(knowledge.get_current_version, tenant)
+            if version is None:
+                raise ValueError("No knowledge version has been published")
+            current = self._loaded.get(tenant.id)
+            if current is None or current.version != version:
+                try:
+                    with tracing.span("knowledge.reload", tenant=tenant.id, version=version):
+                        entry = await asyncio.to_thread(self._open, tenant, version)
+                except Exception:
+                    KNOWLEDGE_RELOADS.labels(result="error").inc()
+                    raise
+                self._install(entry)
+                self.stats_for(tenant.id).reloads += 1
+                KNOWLEDGE_RELOADS.labels(result="success").inc()
+                logger.info(f"Knowledge of tenant {tenant.id} reloaded: {current.version if current else None} -> {version}")
+            if publish:
+                await asyncio.to_thread(knowledge.publish_version, version, tenant)
+            return version
+
+    async def sync(self, tenant: Tenant) -> bool:
+        """Reloads a loaded tenant if another worker published a new version. Returns whether it did."""
+        entry = self._loaded.get(tenant.id)
+        if entry is None:
+            return False # picks up the published version when next loaded
+        current = await asyncio.to_thread(knowledge.get_current_version, tenant)
+        if current is None or current == entry.version:
+            return False
+        # Re-read under the reload lock, in case this worker is publishing a newer version
+        await self.reload(tenant)
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """Polls the published versions of the loaded tenants every `interval` seconds. Runs until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            for entry in self.loaded():
+                try:
+                    await self.sync(entry.tenant)
+                except Exception as e:
+                    logger.warning(f"Knowledge reload of tenant {entry.tenant.id} failed, still serving version {entry.version}: {e}")
+
+    def building(self, tenant_id: str) -> bool:
+        task = self._builds.get(tenant_id)
+        return task is not None and not task.done()
+
+    def start_rebuild(self, tenant: Tenant) -> bool:
+        """
+        Builds a new index version of a tenant from its sources in the background, then
+        swaps it in and publishes it. Other workers pick it up on their next poll.
+        Returns False if a rebuild of this tenant is already running in this worker.
+        """
+        if self.building(tenant.id):
+            return False
+        self.build_errors[tenant.id] = None
+        self._builds[tenant.id] = asyncio.create_task(self._rebuild(tenant))
+        return True
+
+    async def _rebuild(self, tenant: Tenant) -> None:
+        try:
+            with tracing.span("knowledge.build", tenant=tenant.id):
+                version = await asyncio.to_thread(knowledge.build_index_version, tenant)
+            await self.reload(tenant, version, publish=True)
+            await asyncio.to_thread(knowledge.prune_versions, settings.KNOWLEDGE_VERSIONS_TO_KEEP, tenant)
+        except Exception as e:
+            self.build_errors[tenant.id] = str(e)
+            logger.exception(f"Knowledge rebuild of tenant {tenant.id} failed: {e}")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-tenant state and counters of this worker."""
+        rows = []
+        for tenant in self.tenants:
+            entry = self._loaded.get(tenant.id)
+            stats = self.stats_for(tenant.id)
+            rows.append({
+                "tenant_id": tenant.id,
+                "loaded": entry is not None,
+                "loaded_version": entry.version if entry else None,
+                "memory_mb": round(entry.memory_bytes / 2**20, 2) if entry else 0.0,
+                "cached_chains": len(entry.chain_cache) if entry else 0,
+                "building": self.building(tenant.id),
+                **vars(stats),
+            })
+        return rows
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Sequence, Set
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio of Gemini tokenizers for English and Indonesian text
+CHARS_PER_TOKEN = 4
+# Turns awaiting a summary are capped at this multiple of the token budget; older ones are dropped
+MAX_PENDING_BUDGET_FACTOR = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the token count of a text without calling the model's tokenizer."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def message_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+class BudgetedChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat history that keeps recent turns verbatim within a token budget and folds
+    older turns into a running summary.
+
+    When the recent turns exceed `token_budget`, the oldest are moved to a pending
+    list and `summarize` is scheduled in the background. Pending turns stay visible
+    until their summary is ready, so nothing is lost while the summarizer runs, and
+    the chain never waits for it. If summaries keep failing (e.g. the summarizer is
+    shed under load), the oldest pending turns are dropped beyond
+    MAX_PENDING_BUDGET_FACTOR times the budget.
+    """
+    def __init__(
+        self,
+        token_budget: int,
+        summarize: Optional[Callable[["BudgetedChatMessageHistory"], Awaitable[None]]] = None,
+        min_recent_messages: int = 2,
+    ):
+        self.token_budget = token_budget
+        self.min_recent_messages = min_recent_messages
+        self.summary = ""
+        self.recent: List[BaseMessage] = []
+        self.pending: List[BaseMessage] = []
+        self._summarize = summarize
+        self._summarizing = False
+        self._tasks: Set[asyncio.Task] = set()
+        # Bumped by clear(), so a summary started before it is discarded
+        self.generation = 0
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        prefix = []
+        if self.summary:
+            prefix.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        return prefix + self.pending + self.recent
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        return self.messages
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.recent.extend(messages)
+        while (
+            len(self.recent) > self.min_recent_messages
+            and message_tokens(self.recent) > self.token_budget
+        ):
+            # Evict whole turns (user message and answer) to keep the history well-formed
+            self.pending.extend(self.recent[:2])
+            del self.recent[:2]
+        self._cap_pending()
+        if self.pending:
+            self._schedule_summary()
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.add_messages(messages)
+
+    def _cap_pending(self) -> None:
+        limit = MAX_PENDING_BUDGET_FACTOR * self.token_budget
+        dropped = 0
+        while self.pending and message_tokens(self.pending) > limit:
+            del self.pending[:2]
+            dropped += 1
+        if dropped:
+            logger.warning(f"Conversation summary is behind; dropped the {dropped} oldest turns to stay within the memory budget")
+
+    def _schedule_summary(self) -> None:
+        if self._summarize is None or self._summarizing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return # no event loop (sync caller); retried on the next turn
+        self._summarizing = True
+        task = loop.create_task(self._run_summary(self.generation))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_summary(self, generation: int) -> None:
+        try:
+            await self._summarize(self)
+        except Exception as e:
+            logger.warning(f"Conversation summarization failed, keeping turns verbatim: {e}")
+        finally:
+            if generation == self.generation:
+                self._summarizing = False
+
+    def apply_summary(self, summary: str, folded: Sequence[BaseMessage], generation: Optional[int] = None) -> bool:
+        """
+        Replaces the running summary and drops the pending turns it now covers.
+        Returns False, without changing anything, if the history was cleared since
+        `generation` (the value read when the summary was started).
+        """
+        if generation is not None and generation != self.generation:
+            return False
+        self.summary = summary
+        folded_ids = {id(message) for message in folded}
+        self.pending = [message for message in self.pending if id(message) not in folded_ids]
+        return True
+
+    def token_count(self) -> int:
+        return message_tokens(self.messages)
+
+    def clear(self) -> None:
+        self.summary = ""
+        self.recent = []
+        self.pending = []
+        self.generation += 1
+        self._summarizing = False
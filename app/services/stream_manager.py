@@ -1,18 +1,33 @@
 import json
+import time
 import asyncio
-from typing import TYPE_CHECKING, AsyncGenerator, List, Optional
+import logging
+from typing import TYPE_CHECKING, AsyncGenerator, AsyncIterator, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
-from app.core.prompts import (
-    HIRING_MANAGER_SYSTEM_PROMPT_TEMPLATE,
-    SYSTEM_PROMPT_TEMPLATE,
-)
 from app.core.utils import create_mailto_link
+from app.core import tracing
+from app.core.config import settings
+from app.core.metrics import STAGE_DURATION, TOKENS_STREAMED, CHAT_STREAM_ERRORS, CACHE_HITS, CACHE_MISSES, GENERATION_PATH
+from app.core.hedging import hedged_stream
+from app.core.admission import admission, AdmissionRejected, Priority
+from app.core.language import LanguageContext, resolve_language
+from app.core.tenants import Tenant, TenantNotProvisioned
+from app.services.callbacks import StageTimingCallbackHandler
 
 if TYPE_CHECKING:
     from app.services.chat_service import ChatService
+    from app.services.knowledge_registry import TenantKnowledge
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(message: str) -> str:
+    """Normalizes a question for coalescing: case, whitespace and trailing punctuation are ignored."""
+    return " ".join(message.lower().split()).rstrip("?!. ")
 
 
 class _ChatStreamManager:
@@ -21,13 +36,19 @@ class _ChatStreamManager:
     This encapsulates the logic for streaming and suggestion generation.
     Logging and file saving are handled by a background task.
     """
-    def __init__(self, service: 'ChatService', session_id: str, message: str):
+    def __init__(self, service: 'ChatService', session_id: str, message: str, tenant: Tenant, language: Optional[LanguageContext] = None):
         self.service = service
-        self.session_id = session_id
+        self.tenant = tenant
+        # Chat history, locks and chains are keyed by the tenant-scoped session
+        self.session_id = service.session_key(tenant.id, session_id)
         self.message = message
+        self.language = language or resolve_language(message=message)
+        self.knowledge: Optional['TenantKnowledge'] = None
         self.full_answer = ""
         self.suggested_questions: Optional[List[str]] = None
         self.mailto_link: Optional[str] = None
+        self.intent: Optional[str] = None
+        self._started_at = time.perf_counter()
 
     async def process(self) -> AsyncGenerator[str, None]:
         """
@@ -36,49 +57,146 @@ class _ChatStreamManager:
         try:
             session_lock = self.service.get_session_lock(self.session_id)
             async with session_lock:
-                user_intent = await self.service._get_user_intent(self.message)
-            
+                with tracing.span("chat.intent") as intent_span:
+                    user_intent = await self.service.flights.do(
+                        ("intent", normalize_question(self.message)),
+                        lambda: self.service._get_user_intent(self.message),
+                    )
+                    intent_span.set_attribute("intent", user_intent.value)
+            self.intent = user_intent.value
+
             if user_intent == self.service.UserIntent.CREATE_EMAIL:
                 self.full_answer = "Great! I've prepared an email for you. Please click the link to open it in your email client."
                 self.mailto_link = create_mailto_link(
-                    email="fadhilhidayat27@gmail.com",
-                    subject="Job Opportunity Discussion",
-                    body="Hello Fadhil,\n\nI came across your portofolio and would like to discuss a potential opportunity. Are you available for a brief chat next week?\n\nBest regards,"
+                    email=self.tenant.contact_email,
+                    subject=self.tenant.email_subject,
+                    body=self.tenant.email_body,
                 )
                 yield f"event: token\ndata: {json.dumps({'token': self.full_answer})}\n\n"
             else:
                 system_prompt = (
-                    HIRING_MANAGER_SYSTEM_PROMPT_TEMPLATE
+                    self.tenant.hiring_manager_prompt
                     if user_intent == self.service.UserIntent.RECRUITER
-                    else SYSTEM_PROMPT_TEMPLATE
+                    else self.tenant.system_prompt
                 )
-                conversational_rag_chain = self.service.get_rag_chain(system_prompt)
-                async for token in self._stream_answer(conversational_rag_chain):
-                    yield token
+                # Held for the whole answer, so a reload or eviction does not affect it
+                self.knowledge = await self.service.knowledge.get(self.tenant)
+                priority = Priority.HIGH if user_intent == self.service.UserIntent.RECRUITER else Priority.NORMAL
+                with tracing.span("chat.generate") as generate_span:
+                    tokens, shared = self._answer_tokens(system_prompt, priority, user_intent.value)
+                    generate_span.set_attribute("coalesced", shared)
+                    async for token in self._stream_answer(tokens):
+                        yield token
+                    generate_span.set_attribute("answer_chars", len(self.full_answer))
+                if shared:
+                    # The shared generation only wrote the leader's history; record this session's turn.
+                    self.service.get_session_history(self.session_id).add_messages(
+                        [HumanMessage(content=self.message), AIMessage(content=self.full_answer)]
+                    )
             
             if not self.mailto_link:
-                self.suggested_questions = await self.service._generate_suggested_questions(self.message, self.full_answer)
+                with tracing.span("chat.suggested_questions"):
+                    self.suggested_questions = await self.service.flights.do(
+                        ("suggestions", normalize_question(self.message), self.language.code, self.full_answer),
+                        lambda: self.service._generate_suggested_questions(self.message, self.full_answer, self.language.name),
+                    )
 
             final_questions = self.suggested_questions if self.suggested_questions is not None else []
 
             final_data = {
                 "suggested_questions": final_questions,
-                "mailto": self.mailto_link
+                "mailto": self.mailto_link,
+                "intent": self.intent,
+                "language": self.language.code,
             }
             yield f"event: final\ndata: {json.dumps(final_data)}\n\n"
 
+        except (AdmissionRejected, TenantNotProvisioned):
+            # Surfaced to the endpoint, which answers 503
+            raise
         except Exception as e:
-            print(f"An error occurred during the stream processing: {e}")
+            # LLM failures are already counted as upstream errors by the callback handler
+            CHAT_STREAM_ERRORS.labels(error=type(e).__name__).inc()
+            logger.exception(f"An error occurred during the stream processing: {e}")
             error_data = json.dumps({"error": "An error occurred while processing your request."})
             yield f"event: error\ndata: {error_data}\n\n"
 
-    async def _stream_answer(self, chain: RunnableWithMessageHistory) -> AsyncGenerator[str, None]:
-        """Streams the main response from the RAG chain."""
+    def _answer_tokens(self, system_prompt: str, priority: Priority, variant: str) -> Tuple[AsyncIterator[str], bool]:
+        """
+        Returns the answer token stream and whether it is shared with an identical request.
+        First-turn requests (no history yet) to the same tenant with the same normalized
+        question, prompt variant, language and knowledge version subscribe to a single
+        in-flight generation.
+        """
+        if not settings.SINGLE_FLIGHT_ENABLED or self.service.get_session_history(self.session_id).messages:
+            return self._generate(system_prompt, priority), False
+
+        key = ("answer", self.tenant.id, normalize_question(self.message), variant, self.language.code, self.knowledge.version)
+        tokens, leader = self.service.flights.stream(key, lambda: self._generate(system_prompt, priority))
+        (CACHE_MISSES if leader else CACHE_HITS).labels(cache="singleflight").inc()
+        return tokens, not leader
+
+    async def _generate(self, system_prompt: str, priority: Priority) -> AsyncIterator[str]:
+        """
+        Runs the RAG chain for this session, yielding answer chunks.
+        A main model that misses the first-token deadline is hedged with the fallback model;
+        only the winning chain completes, so only its turn is written to the session history.
+        Each chain holds its own model's admission slot, so a cancelled primary frees its
+        main LLM slot at once and hedges cannot overload the fallback model.
+        """
+        primary_chain = self.service.get_rag_chain(self.knowledge, system_prompt)
+        fallback_factory = None
+        if settings.GENERATION_HEDGING_ENABLED and self.service.fallback_llm is not None:
+            fallback_chain = self.service.get_rag_chain(self.knowledge, system_prompt, fallback=True)
+            fallback_factory = lambda: self._fallback_tokens(fallback_chain, priority)
+
+        async for answer_chunk in hedged_stream(
+            self._primary_tokens(primary_chain, priority),
+            fallback_factory,
+            first_token_timeout=settings.GENERATION_FIRST_TOKEN_TIMEOUT_SECONDS or None,
+            inter_token_timeout=settings.GENERATION_INTER_TOKEN_TIMEOUT_SECONDS or None,
+            on_winner=self._record_generation_path,
+        ):
+            yield answer_chunk
+
+    async def _primary_tokens(self, chain: RunnableWithMessageHistory, priority: Priority) -> AsyncIterator[str]:
+        async with admission.slot("main_llm", priority):
+            async for answer_chunk in self._chain_tokens(chain, "main_llm"):
+                yield answer_chunk
+
+    async def _fallback_tokens(self, chain: RunnableWithMessageHistory, priority: Priority) -> AsyncIterator[str]:
+        async with admission.slot("fallback_llm", priority):
+            async for answer_chunk in self._chain_tokens(chain, "fallback_llm"):
+                yield answer_chunk
+
+    async def _chain_tokens(self, chain: RunnableWithMessageHistory, service: str) -> AsyncIterator[str]:
         async for chunk in chain.astream(
-            {"input": self.message},
-            config={"configurable": {"session_id": self.session_id}},
+            {"input": self.message, "language": self.language.name},
+            config={
+                "configurable": {"session_id": self.session_id},
+                "callbacks": [StageTimingCallbackHandler(service=service)],
+            },
         ):
             if answer_chunk := chunk.get("answer"):
-                self.full_answer += answer_chunk
-                data = json.dumps({"token": answer_chunk})
-                yield f"event: token\ndata: {data}\n\n"
\ No newline at end of file
+                yield answer_chunk
+
+    def _record_generation_path(self, path: str) -> None:
+        GENERATION_PATH.labels(path=path).inc()
+        if span := tracing.current_span():
+            span.set_attribute("generation_path", path)
+        if path != "primary":
+            logger.warning(f"Main LLM was slow to respond; answer streamed via the {path} path")
+
+    async def _stream_answer(self, tokens: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+        """Streams the answer as SSE events, recording time-to-first-token and total generation time."""
+        generation_started_at = time.perf_counter()
+        first_token = True
+        async for answer_chunk in tokens:
+            if first_token:
+                STAGE_DURATION.labels(stage="ttft").observe(time.perf_counter() - self._started_at)
+                first_token = False
+            TOKENS_STREAMED.inc()
+            self.full_answer += answer_chunk
+            data = json.dumps({"token": answer_chunk})
+            yield f"event: token\ndata: {data}\n\n"
+        STAGE_DURATION.labels(stage="generation").observe(time.perf_counter() - generation_started_at)
\ No newline at end of file
@@ -0,0 +1,140 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TYPE_CHECKING
+
+from app.core import ann, tracing
+from app.core.language import detect_language
+from app.core.metrics import WARMUP_DURATION
+from app.core.tenants import DEFAULT_TENANT_ID
+
+if TYPE_CHECKING:
+    from app.services.audio_service import AudioService
+    from app.services.chat_service import ChatService
+    from app.services.knowledge_registry import TenantKnowledge
+
+logger = logging.getLogger(__name__)
+
+# One short text per supported language; the first detection loads every langdetect profile
+LANGUAGE_SAMPLES = ("What projects have you built?", "Proyek apa saja yang pernah kamu buat?")
+CONNECT_TIMEOUT_SECONDS = 5.0
+# Without these, the worker cannot answer, so it is not reported ready
+CRITICAL_STAGES = ("knowledge", "chains")
+
+
+async def _open_channel(client: Any) -> bool:
+    """
+    Connects a Google API client's gRPC channel without sending a request.
+    Returns False for clients without one (e.g. REST transport), which connect on first use.
+    """
+    channel = getattr(getattr(client, "transport", None), "grpc_channel", None)
+    channel_ready = getattr(channel, "channel_ready", None)
+    if channel_ready is None:
+        return False
+    await asyncio.wait_for(channel_ready(), CONNECT_TIMEOUT_SECONDS)
+    return True
+
+
+class Warmup:
+    """
+    Prepares a fresh worker before it reports ready. It loads the default tenant's index
+    (building a first one if none exists) and always does so; with `enabled`, it also
+    touches the index, builds the RAG chains on the main and fallback LLMs, loads the
+    language detector, opens the Gemini, STT and TTS connections and replays common
+    questions through retrieval and language detection.
+
+    A failed stage is logged and reported. The worker is ready once all stages have run
+    and none of CRITICAL_STAGES failed; the others are retried lazily by the first request.
+    """
+    def __init__(
+        self,
+        chat_service: "ChatService",
+        audio_service: "AudioService",
+        questions: Optional[List[str]] = None,
+        enabled: bool = True,
+    ):
+        self.chat_service = chat_service
+        self.audio_service = audio_service
+        self.questions = questions or []
+        self.enabled = enabled
+        self.done = False
+        self.stages: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    async def run(self) -> None:
+        started_at = time.perf_counter()
+        with tracing.span("warmup"):
+            tenant_knowledge = await self._stage("knowledge", self._load_knowledge)
+            if self.enabled:
+                if tenant_knowledge is not None:
+                    await self._stage("chains", self._build_chains, tenant_knowledge)
+                await self._stage("language", self._load_language_profiles)
+                await self._stage("connections", self._open_connections)
+                if tenant_knowledge is not None and self.questions:
+                    await self._stage("questions", self._replay_questions, tenant_knowledge)
+        self.done = True
+        if self.ready:
+            logger.info(f"Warm-up finished in {time.perf_counter() - started_at:.2f}s: {self.stages}")
+        else:
+            logger.error(f"Warm-up failed, the worker stays unready: {self.errors}")
+
+    @property
+    def ready(self) -> bool:
+        return self.done and not any(stage in self.errors for stage in CRITICAL_STAGES)
+
+    def report(self) -> Dict[str, Any]:
+        if self.ready:
+            status = "ready"
+        else:
+            status = "failed" if self.done else "warming_up"
+        return {
+            "status": status,
+            "stages": self.stages,
+            "errors": self.errors,
+        }
+
+    async def _stage(self, name: str, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        started_at = time.perf_counter()
+        try:
+            with tracing.span(f"warmup.{name}"):
+                return await func(*args)
+        except Exception as e:
+            self.errors[name] = str(e)
+            logger.warning(f"Warm-up stage {name} failed: {e}")
+            return None
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.stages[name] = round(elapsed, 3)
+            WARMUP_DURATION.labels(stage=name).observe(elapsed)
+
+    async def _load_knowledge(self) -> "TenantKnowledge":
+        tenant = self.chat_service.tenants.get(DEFAULT_TENANT_ID)
+        tenant_knowledge = await self.chat_service.knowledge.provision(tenant)
+        if self.enabled:
+            await asyncio.to_thread(ann.touch_index, tenant_knowledge.retriever.vectorstore.index)
+        return tenant_knowledge
+
+    async def _build_chains(self, tenant_knowledge: "TenantKnowledge") -> None:
+        tenant = tenant_knowledge.tenant
+        for fallback in (False, True):
+            for system_prompt in (tenant.system_prompt, tenant.hiring_manager_prompt):
+                self.chat_service.get_rag_chain(tenant_knowledge, system_prompt, fallback=fallback)
+
+    async def _load_language_profiles(self) -> None:
+        for text in LANGUAGE_SAMPLES:
+            await asyncio.to_thread(detect_language, text)
+
+    async def _open_connections(self) -> None:
+        llms = (self.chat_service.llm, self.chat_service.fallback_llm, self.chat_service.helper_llm)
+        # The LLMs' async clients are created lazily on first access
+        clients = [getattr(llm, "async_client", None) for llm in llms if llm is not None]
+        clients += [self.audio_service.stt_client, self.audio_service.tts_client]
+        results = await asyncio.gather(*(_open_channel(client) for client in clients), return_exceptions=True)
+        failures = [str(result) or type(result).__name__ for result in results if isinstance(result, Exception)]
+        if failures:
+            raise RuntimeError(f"{len(failures)} of {len(clients)} connections failed: {'; '.join(failures)}")
+
+    async def _replay_questions(self, tenant_knowledge: "TenantKnowledge") -> None:
+        for question in self.questions:
+            await asyncio.to_thread(detect_language, question)
+            await tenant_knowledge.retriever.ainvoke(question)
@@ -0,0 +1,62 @@
+"""
+ASGI entry point that runs the real application against the local fakes.
+
+Normally started by `python -m benchmarks.load_test`, which sets the BENCH_*
+environment variables, prepares a SQLite database and a FAISS index built with
+the fake embeddings, then runs:
+
+    gunicorn -k uvicorn.workers.UvicornWorker -w <workers> benchmarks.bench_app:app
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import LOCAL_KNOWLEDGE_SOURCES
+from benchmarks.fakes import (
+    FakeChatModel,
+    FakeEmbeddings,
+    FakeSpeechAsyncClient,
+    FakeTextToSpeechAsyncClient,
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def install_fakes() -> None:
+    """
+    Replaces the Google client classes with the local fakes.
+    Must run before any `app` module is imported, because they import the classes by name.
+    """
+    import langchain_google_genai
+    from google.cloud import speech
+    from google.cloud import texttospeech_v1
+
+    chat_options = {
+        "token_rate": _env_float("BENCH_TOKEN_RATE", 50.0),
+        "first_token_delay": _env_float("BENCH_FIRST_TOKEN_DELAY", 0.3),
+        "answer_tokens": int(_env_float("BENCH_ANSWER_TOKENS", 120)),
+        "helper_delay": _env_float("BENCH_HELPER_DELAY", 0.05),
+    }
+    stt_latency = _env_float("BENCH_STT_LATENCY", 0.2)
+    tts_latency = _env_float("BENCH_TTS_LATENCY", 0.3)
+
+    langchain_google_genai.ChatGoogleGenerativeAI = lambda **kwargs: FakeChatModel(**kwargs, **chat_options)
+    langchain_google_genai.GoogleGenerativeAIEmbeddings = lambda **kwargs: FakeEmbeddings()
+    speech.SpeechAsyncClient = lambda **kwargs: FakeSpeechAsyncClient(latency=stt_latency)
+    texttospeech_v1.TextToSpeechAsyncClient = lambda **kwargs: FakeTextToSpeechAsyncClient(latency=tts_latency)
+
+    import app.core.knowledge as knowledge
+    knowledge.KNOWLEDGE_SOURCES = LOCAL_KNOWLEDGE_SOURCES
+    if os.environ.get("BENCH_INDEX_PATH"):
+        knowledge.VECTOR_STORE_PATH = os.environ["BENCH_INDEX_PATH"]
+
+
+# Benchmarks drive far more traffic per client than the production rate limit allows.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+install_fakes()
+
+from app.main import app  # noqa: E402
@@ -0,0 +1,33 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+from typing import List, Optional
+
+# Knowledge sources that can be loaded without network access.
+LOCAL_KNOWLEDGE_SOURCES = [
+    {"type": "text", "path": "bio.txt"},
+    {"type": "text", "path": "portofolio_ai_chatbot_backend.txt"},
+    {"type": "pdf", "path": "Fadhil_Ahmad_Hidayat_Resume.pdf"},
+    {"type": "pdf", "path": "linkedinn.pdf"},
+]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(p / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def rss_mb(pid: str = "self") -> Optional[float]:
+    """Resident memory of a process in MiB (Linux /proc only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
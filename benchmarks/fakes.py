@@ -0,0 +1,168 @@
+"""
+Deterministic local stand-ins for the Google clients used by the application.
+
+They mimic the call signatures and response shapes of ChatGoogleGenerativeAI,
+GoogleGenerativeAIEmbeddings and the Cloud Speech/Text-to-Speech async clients,
+with configurable latencies, so benchmarks measure our own overhead without a
+network connection or API key.
+"""
+import re
+import json
+import asyncio
+import hashlib
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+ANSWER_VOCABULARY = (
+    "Fadhil", "builds", "backend", "services", "with", "FastAPI", "and", "LangChain,",
+    "deploys", "machine", "learning", "models", "such", "as", "YOLOv8,", "and", "ships",
+    "mobile", "apps", "in", "React", "Native.",
+)
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers helper prompts with canned, deterministic output.
+    The answer stream waits `first_token_delay` seconds, then emits `answer_tokens`
+    tokens at `token_rate` tokens per second.
+    """
+    model: str = "fake-gemini"
+    google_api_key: Optional[str] = None
+    temperature: float = 0.0
+    token_rate: float = 50.0
+    first_token_delay: float = 0.3
+    answer_tokens: int = 120
+    helper_delay: float = 0.05
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _respond(self, messages: List[BaseMessage]) -> Optional[str]:
+        """Returns the full reply for helper prompts, or None for an answer prompt."""
+        # Helper prompts are recognised by how they start; answer prompts embed
+        # retrieved documents, so their content is not inspected further.
+        prompt = str(messages[0].content)
+        if prompt.startswith("Classify the user's intent"):
+            user_message = prompt.split("User Message:")[-1].lower()
+            if any(word in user_message for word in ("hiring", "recruit", "position")):
+                return "recruiter"
+            return "general_inquiry"
+        if prompt.startswith("Based on the following question and answer"):
+            return json.dumps([
+                "What projects has Fadhil worked on?",
+                "Which technologies does Fadhil use?",
+                "How can I contact Fadhil?",
+            ])
+        if prompt.startswith("Progressively summarize"):
+            return "The user asked about Fadhil's projects and experience."
+        if prompt.startswith("Given a chat history"):
+            return str(messages[-1].content)
+        return None
+
+    def _answer_tokens(self) -> Iterator[str]:
+        for i in range(self.answer_tokens):
+            yield ANSWER_VOCABULARY[i % len(ANSWER_VOCABULARY)] + " "
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        if text is None:
+            text = "".join(self._answer_tokens())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        if text is not None:
+            await asyncio.sleep(self.helper_delay)
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+        chunks = [chunk.message.content async for chunk in self._astream(messages, stop, run_manager, **kwargs)]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(chunks)))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        if text is not None:
+            await asyncio.sleep(self.helper_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+            return
+
+        await asyncio.sleep(self.first_token_delay)
+        interval = 1.0 / self.token_rate if self.token_rate > 0 else 0.0
+        for token in self._answer_tokens():
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            if interval:
+                await asyncio.sleep(interval)
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic hashed bag-of-words embeddings.
+    Texts sharing words get similar vectors, so retrieval quality is meaningful
+    enough for recall measurements while staying fully local.
+    """
+    def __init__(self, size: int = 256, **kwargs: Any):
+        self.size = size
+
+    def token_slot(self, token: str) -> Tuple[int, float]:
+        """Returns the vector index and sign a (lower-cased) token contributes to."""
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest[:4], "little") % self.size, 1.0 if digest[4] & 1 else -1.0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for token in _tokenize(text):
+            index, sign = self.token_slot(token)
+            vector[index] += sign
+        norm = sum(v * v for v in vector) ** 0.5
+        if norm == 0:
+            vector[0] = 1.0
+            return vector
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class FakeSpeechAsyncClient:
+    """
+    Stand-in for google.cloud.speech.SpeechAsyncClient.recognize().
+    """
+    def __init__(self, *args: Any, latency: float = 0.2, transcript: str = "What projects has Fadhil built?", language_code: str = "en-us", **kwargs: Any):
+        self.latency = latency
+        self.transcript = transcript
+        self.language_code = language_code
+
+    async def recognize(self, config: Any = None, audio: Any = None, **kwargs: Any) -> Any:
+        await asyncio.sleep(self.latency)
+        alternative = SimpleNamespace(transcript=self.transcript, confidence=0.95)
+        result = SimpleNamespace(alternatives=[alternative], language_code=self.language_code)
+        return SimpleNamespace(results=[result])
+
+
+class FakeTextToSpeechAsyncClient:
+    """
+    Stand-in for google.cloud.texttospeech_v1.TextToSpeechAsyncClient.synthesize_speech().
+    Returns roughly 1 KiB of fake MP3 data per 10 characters of input.
+    """
+    def __init__(self, *args: Any, latency: float = 0.3, **kwargs: Any):
+        self.latency = latency
+
+    async def synthesize_speech(self, input: Any = None, voice: Any = None, audio_config: Any = None, **kwargs: Any) -> Any:
+        await asyncio.sleep(self.latency)
+        text = getattr(input, "text", "") or ""
+        return SimpleNamespace(audio_content=b"\xff\xfb" + b"\x00" * (len(text) * 100))
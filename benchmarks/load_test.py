@@ -0,0 +1,233 @@
+"""
+End-to-end load test of the chat API against deterministic local fakes.
+
+Starts the real application under gunicorn with fake Gemini, embeddings, STT and
+TTS clients and a SQLite database, drives POST /api/v1/chat/ at a fixed
+concurrency and reports throughput, total latency percentiles and the resident
+memory of each worker. The endpoint returns the answer in one body, so there is
+no client-side time to first token; see chat_stage_duration_seconds{stage="ttft"}.
+
+    python -m benchmarks.load_test --requests 200 --concurrency 20 --workers 2
+"""
+import os
+import sys
+import json
+import time
+import wave
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from io import BytesIO
+from uuid import uuid4
+from typing import Dict, List, Optional
+
+import httpx
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.common import percentile, rss_mb
+
+QUESTIONS = [
+    "What projects has Fadhil worked on?",
+    "Tell me about Fadhil's experience with FastAPI.",
+    "Which machine learning models has Fadhil deployed?",
+    "Where did Fadhil study?",
+    "Apa saja proyek yang pernah dikerjakan Fadhil?",
+    "We are hiring a backend engineer, is Fadhil a good fit for the position?",
+]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="total number of chat requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight at once")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token-rate", type=float, default=50.0, help="fake LLM tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="fake LLM delay before the first token (s)")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="tokens per fake answer")
+    parser.add_argument("--helper-delay", type=float, default=0.05, help="fake helper LLM latency (s)")
+    parser.add_argument("--stt-latency", type=float, default=0.2)
+    parser.add_argument("--tts-latency", type=float, default=0.3)
+    parser.add_argument("--audio-in-ratio", type=float, default=0.0, help="fraction of requests sent as WAV audio")
+    parser.add_argument("--audio-out-ratio", type=float, default=0.0, help="fraction of requests asking for an MP3 answer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace, workdir: str) -> Dict[str, str]:
+    """
+    Points the application at throwaway local resources and the fake clients' settings.
+    """
+    overrides = {
+        "GOOGLE_API_KEY": "benchmark",
+        "POSTGRES_SERVER": "unused",
+        "POSTGRES_USER": "unused",
+        "POSTGRES_PASSWORD": "unused",
+        "POSTGRES_DB": "unused",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}",
+        "AUDIO_DIR": os.path.join(workdir, "audio"),
+        "ENVIRONMENT": "production",
+        "LOG_LEVEL": "WARNING",
+        "TRACING_EXPORTER": "none",
+        "BENCH_INDEX_PATH": os.path.join(workdir, "faiss_index"),
+        "BENCH_TOKEN_RATE": str(args.token_rate),
+        "BENCH_FIRST_TOKEN_DELAY": str(args.first_token_delay),
+        "BENCH_ANSWER_TOKENS": str(args.answer_tokens),
+        "BENCH_HELPER_DELAY": str(args.helper_delay),
+        "BENCH_STT_LATENCY": str(args.stt_latency),
+        "BENCH_TTS_LATENCY": str(args.tts_latency),
+    }
+    os.environ.update(overrides)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def prepare_resources() -> None:
+    """
+    Builds the fake-embedding FAISS index and creates the SQLite tables once,
+    so the workers only load them.
+    """
+    from benchmarks.bench_app import app  # noqa: F401  (installs fakes, builds the index)
+    from app.core.database import init_db, engine
+
+    async def _init():
+        await init_db()
+        await engine.dispose()
+
+    asyncio.run(_init())
+
+
+def make_wav(duration_s: float = 1.0, sample_rate: int = 16000) -> bytes:
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * int(duration_s * sample_rate))
+    return buffer.getvalue()
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {f"p{p}": (round(v * 1000, 1) if (v := percentile(values, p)) is not None else None) for p in (50, 95, 99)}
+
+
+async def run_load(args: argparse.Namespace, base_url: str) -> dict:
+    rng = random.Random(args.seed)
+    wav_bytes = make_wav()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latency: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one_request(client: httpx.AsyncClient, i: int):
+        data = {
+            "session_id": str(uuid4()),
+            "include_audio_response": str(rng.random() < args.audio_out_ratio).lower(),
+        }
+        files = None
+        if rng.random() < args.audio_in_ratio:
+            files = {"audio_file": ("question.wav", wav_bytes, "audio/wav")}
+        else:
+            data["message"] = QUESTIONS[i % len(QUESTIONS)]
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/v1/chat/", data=data, files=files)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            finished = time.perf_counter()
+
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == "200":
+            latency.append(finished - started)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request(client, i) for i in range(args.requests)))
+        duration = time.perf_counter() - started
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "duration_s": round(duration, 2),
+        "throughput_rps": round(len(latency) / duration, 2) if duration else None,
+        "status_counts": statuses,
+        "latency_ms": summarize(latency),
+    }
+
+
+def worker_rss_mb(master_pid: int) -> List[float]:
+    """
+    Returns the resident memory of each gunicorn worker (Linux /proc only).
+    """
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            children = [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+    return [rss for rss in (rss_mb(str(pid)) for pid in children) if rss is not None]
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/readyz")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError("The benchmark server did not become ready in time.")
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="portofolio-bench-")
+    env = configure_environment(args, workdir)
+    prepare_resources()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "-k", "uvicorn.workers.UvicornWorker",
+            "-w", str(args.workers),
+            "-b", f"127.0.0.1:{args.port}",
+            "--log-level", "warning",
+            "benchmarks.bench_app:app",
+        ],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+    try:
+        asyncio.run(wait_until_healthy(base_url))
+        report = asyncio.run(run_load(args, base_url))
+        report["worker_rss_mb"] = worker_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
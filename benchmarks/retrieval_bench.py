@@ -0,0 +1,332 @@
+"""
+Retrieval-layer microbenchmark and recall evaluation at scaled corpus sizes.
+
+Builds FAISS stores the same way `get_retriever()` does, from the local documents
+in static/docs (split with the chunking parameters under test) mixed with N
+synthetic filler chunks, using deterministic hashed bag-of-words embeddings.
+For each corpus size, chunking configuration and index type it reports index
+build time, on-disk size, load time, process memory, query latency at several k,
+and recall@k against the labelled questions in benchmarks/data/retrieval_questions.json.
+Approximate indexes are swept over their search parameter (nprobe or efSearch)
+and also report ANN recall@k: the share of the exact (flat) top-k they return,
+i.e. the recall-vs-latency tradeoff.
+
+    python -m benchmarks.retrieval_bench --sizes 1000,10000,100000 --chunking 1000:100,500:50
+    python -m benchmarks.retrieval_bench --sizes 1000000 --dim 128   # ~1 GB of RAM
+    python -m benchmarks.retrieval_bench --sizes 100000 --index-types flat,ivf_flat,hnsw,ivf_pq --nprobe 1,8,32
+"""
+import os
+import re
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.core import ann
+from benchmarks.common import LOCAL_KNOWLEDGE_SOURCES, percentile, rss_mb
+from benchmarks.fakes import FakeEmbeddings
+
+DOCS_DIR = os.path.join(PROJECT_ROOT, "static", "docs")
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), "data", "retrieval_questions.json")
+
+SYNTHETIC_VOCABULARY_SIZE = 50_000
+SYNTHETIC_WORDS_PER_CHUNK = 140  # roughly a 1000-character chunk
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated synthetic chunk counts")
+    parser.add_argument("--chunking", default="1000:100", help="comma-separated chunk_size:chunk_overlap pairs")
+    parser.add_argument("--k", default="1,4,10", help="comma-separated k values for latency and recall")
+    parser.add_argument("--dim", type=int, default=256, help="embedding dimension")
+    parser.add_argument("--repeats", type=int, default=20, help="times each question is searched for latency")
+    parser.add_argument("--index-types", default="flat", help=f"comma-separated index types: {','.join(ann.INDEX_TYPES)}")
+    parser.add_argument("--nprobe", default="1,8,32", help="comma-separated nprobe values swept for IVF indexes")
+    parser.add_argument("--ef-search", default="16,64,256", help="comma-separated efSearch values swept for HNSW")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (0 sizes them from the corpus)")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--pq-m", type=int, default=16, help="PQ sub-quantizers; must divide --dim")
+    parser.add_argument("--train-sample", type=int, default=50_000, help="vectors used to train IVF/PQ indexes")
+    parser.add_argument("--ann-queries", type=int, default=200, help="synthetic queries added for ANN recall")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def load_local_documents() -> List[Document]:
+    documents = []
+    for source in LOCAL_KNOWLEDGE_SOURCES:
+        path = os.path.join(DOCS_DIR, source["path"])
+        loader = PyPDFLoader(file_path=path) if source["type"] == "pdf" else TextLoader(file_path=path)
+        documents.extend(loader.load())
+    return documents
+
+
+class SyntheticCorpus:
+    """
+    Generates filler chunks and their embeddings directly with numpy, using the same
+    hashing as FakeEmbeddings so they share a vector space with the real chunks.
+    """
+    def __init__(self, embeddings: FakeEmbeddings, seed: int):
+        self.rng = np.random.default_rng(seed)
+        self.words = [f"syn{i}" for i in range(SYNTHETIC_VOCABULARY_SIZE)]
+        slots = [embeddings.token_slot(word) for word in self.words]
+        self.slot_index = np.array([slot[0] for slot in slots], dtype=np.int64)
+        self.slot_sign = np.array([slot[1] for slot in slots], dtype=np.float32)
+        self.dim = embeddings.size
+
+    def generate(self, count: int, batch_size: int = 20_000):
+        """Yields (texts, vectors) batches."""
+        for start in range(0, count, batch_size):
+            rows = min(batch_size, count - start)
+            tokens = self.rng.integers(0, len(self.words), size=(rows, SYNTHETIC_WORDS_PER_CHUNK))
+            vectors = np.zeros((rows, self.dim), dtype=np.float32)
+            row_ids = np.repeat(np.arange(rows), SYNTHETIC_WORDS_PER_CHUNK)
+            np.add.at(vectors, (row_ids, self.slot_index[tokens].ravel()), self.slot_sign[tokens].ravel())
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            texts = [" ".join(self.words[t] for t in row) for row in tokens]
+            yield texts, vectors
+
+
+def build_store(
+    real_chunks: List[Document],
+    embeddings: FakeEmbeddings,
+    synthetic_count: int,
+    index_type: str,
+    args: argparse.Namespace,
+) -> FAISS:
+    """
+    Builds a store of the given index type holding the real chunks followed by the
+    synthetic ones. Trained indexes are trained on the first `--train-sample`
+    vectors, which are i.i.d. apart from the real chunks.
+    """
+    index = ann.create_index(
+        embeddings.size,
+        len(real_chunks) + synthetic_count,
+        index_type,
+        nlist=args.nlist,
+        hnsw_m=args.hnsw_m,
+        pq_m=args.pq_m,
+    )
+    docstore: Dict[str, Document] = {}
+    index_to_docstore_id: Dict[int, str] = {}
+    untrained: List[np.ndarray] = []
+
+    def add(vectors: np.ndarray) -> None:
+        if not index.is_trained:
+            untrained.append(vectors)
+            if sum(len(v) for v in untrained) < args.train_sample:
+                return
+            flush_untrained()
+        else:
+            index.add(vectors)
+
+    def flush_untrained() -> None:
+        pending = np.vstack(untrained)
+        untrained.clear()
+        ann.train_index(index, pending, args.train_sample, seed=args.seed)
+        index.add(pending)
+
+    real_vectors = np.array(embeddings.embed_documents([c.page_content for c in real_chunks]), dtype=np.float32)
+    add(real_vectors)
+    for i, chunk in enumerate(real_chunks):
+        docstore[str(i)] = chunk
+        index_to_docstore_id[i] = str(i)
+
+    position = len(real_chunks)
+    for texts, vectors in SyntheticCorpus(embeddings, args.seed).generate(synthetic_count):
+        add(vectors)
+        for text in texts:
+            docstore[str(position)] = Document(page_content=text, metadata={"source": "synthetic"})
+            index_to_docstore_id[position] = str(position)
+            position += 1
+    if untrained:
+        flush_untrained()
+
+    store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(docstore),
+        index_to_docstore_id=index_to_docstore_id,
+    )
+    return store
+
+
+def directory_size_mb(path: str) -> float:
+    total = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return round(total / (1024 * 1024), 2)
+
+
+def search_sweep(index_type: str, args: argparse.Namespace) -> List[dict]:
+    """The search parameter values to evaluate for an index type."""
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return [{"nprobe": int(v)} for v in args.nprobe.split(",")]
+    if index_type == "hnsw":
+        return [{"ef_search": int(v)} for v in args.ef_search.split(",")]
+    return [{}]
+
+
+def evaluate(
+    store: FAISS,
+    embeddings: FakeEmbeddings,
+    questions: List[dict],
+    ks: List[int],
+    repeats: int,
+    ann_queries: np.ndarray,
+    exact_ids: Optional[np.ndarray],
+) -> dict:
+    """
+    Measures search latency per k and recall@k: the fraction of questions for which
+    some retrieved chunk contains the labelled answer. With `exact_ids` (the flat
+    index's neighbours of `ann_queries`), also measures ANN recall@k.
+    """
+    query_vectors = [embeddings.embed_query(q["question"]) for q in questions]
+    results = {}
+    for k in ks:
+        latencies = []
+        hits = 0
+        for question, vector in zip(questions, query_vectors):
+            for _ in range(repeats):
+                started = time.perf_counter()
+                documents = store.similarity_search_by_vector(vector, k=k)
+                latencies.append(time.perf_counter() - started)
+            answer = _normalize(question["answer"])
+            if any(answer in _normalize(doc.page_content) for doc in documents):
+                hits += 1
+        results[f"k={k}"] = {
+            "recall": round(hits / len(questions), 3),
+            "latency_ms_p50": round(percentile(latencies, 50) * 1000, 3),
+            "latency_ms_p95": round(percentile(latencies, 95) * 1000, 3),
+        }
+        if exact_ids is not None:
+            _, ids = store.index.search(ann_queries, k)
+            overlap = [len(set(found) & set(exact[:k])) / k for found, exact in zip(ids, exact_ids)]
+            results[f"k={k}"]["ann_recall"] = round(float(np.mean(overlap)), 3)
+    return results
+
+
+def run_case(
+    documents: List[Document],
+    questions: List[dict],
+    synthetic_count: int,
+    chunk_size: int,
+    chunk_overlap: int,
+    args: argparse.Namespace,
+) -> List[dict]:
+    embeddings = FakeEmbeddings(size=args.dim)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    real_chunks = splitter.split_documents(documents)
+    ks = [int(k) for k in args.k.split(",")]
+    index_types = args.index_types.split(",")
+    approximate = [t for t in index_types if t != "flat"]
+
+    # ANN recall is measured on the labelled questions plus synthetic queries
+    synthetic_queries = next(SyntheticCorpus(embeddings, args.seed + 1).generate(args.ann_queries))[1] if args.ann_queries else np.empty((0, args.dim), dtype=np.float32)
+    question_vectors = np.array([embeddings.embed_query(q["question"]) for q in questions], dtype=np.float32)
+    ann_queries = np.vstack([question_vectors, synthetic_queries])
+    exact_ids = None
+
+    # The flat index runs first: it is the exact reference for the approximate ones
+    rows = []
+    for index_type in (["flat"] if approximate or "flat" in index_types else []) + approximate:
+        started = time.perf_counter()
+        store = build_store(real_chunks, embeddings, synthetic_count, index_type, args)
+        build_s = time.perf_counter() - started
+
+        workdir = tempfile.mkdtemp(prefix="retrieval-bench-")
+        try:
+            store.save_local(workdir)
+            disk_mb = directory_size_mb(workdir)
+            del store
+            gc.collect()
+
+            started = time.perf_counter()
+            store = FAISS.load_local(workdir, embeddings, allow_dangerous_deserialization=True)
+            load_s = time.perf_counter() - started
+            rss_after_load = rss_mb()
+
+            if index_type == "flat":
+                exact_ids = store.index.search(ann_queries, max(ks))[1]
+                if "flat" not in index_types:
+                    continue
+
+            for search in search_sweep(index_type, args):
+                ann.set_search_params(store.index, **search)
+                quality = evaluate(
+                    store, embeddings, questions, ks, args.repeats, ann_queries,
+                    exact_ids if index_type != "flat" else None,
+                )
+                rows.append({
+                    "synthetic_chunks": synthetic_count,
+                    "real_chunks": len(real_chunks),
+                    "chunk_size": chunk_size,
+                    "chunk_overlap": chunk_overlap,
+                    "index_type": index_type,
+                    "index": ann.describe_index(store.index),
+                    "search": search,
+                    "build_s": round(build_s, 3),
+                    "disk_mb": disk_mb,
+                    "load_s": round(load_s, 3),
+                    "rss_mb": rss_after_load,
+                    "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                    "results": quality,
+                })
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+            store = None
+            gc.collect()
+
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> List[dict]:
+    args = parse_args(argv)
+    with open(QUESTIONS_PATH, encoding="utf-8") as f:
+        questions = json.load(f)
+    documents = load_local_documents()
+
+    report = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        for pair in args.chunking.split(","):
+            chunk_size, chunk_overlap = (int(v) for v in pair.split(":"))
+            for case in run_case(documents, questions, size, chunk_size, chunk_overlap, args):
+                report.append(case)
+                recalls = " ".join(f"R@{k.split('=')[1]}={r['recall']:.2f}" for k, r in case["results"].items())
+                ann_recalls = " ".join(
+                    f"ANN-R@{k.split('=')[1]}={r['ann_recall']:.2f}" for k, r in case["results"].items() if "ann_recall" in r
+                )
+                latencies = " ".join(f"p50@{k.split('=')[1]}={r['latency_ms_p50']:.2f}ms" for k, r in case["results"].items())
+                print(
+                    f"n={size:>8} chunk={chunk_size}:{chunk_overlap} index=[{case['index']}] build={case['build_s']}s "
+                    f"disk={case['disk_mb']}MB load={case['load_s']}s rss={case['rss_mb']}MB {recalls} {ann_recalls} {latencies}",
+                    flush=True,
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -9,5 +9,11 @@ chown -R appuser:appuser /app/static
 mkdir -p /app/audio
 chown -R appuser:appuser /app/audio
 
+# Create and take ownership of the Prometheus multiprocess directory, if used.
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    chown -R appuser:appuser "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Execute the main command (gunicorn) as the 'appuser'
 exec gosu appuser "$@"
\ No newline at end of file
@@ -0,0 +1,28 @@
+# gunicorn.conf.py
+# Loaded automatically by gunicorn from the working directory.
+
+import os
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    """
+    Clears the metric files left by a previous run, so counters do not carry over from
+    dead processes. Runs once in the master before any worker starts.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    """
+    Drops the live gauge values of a worker that exited, so they no longer count in /metrics.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
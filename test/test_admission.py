@@ -0,0 +1,60 @@
+# tests/test_admission.py
+
+import sys
+import os
+import asyncio
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.admission import AdmissionController, AdmissionRejected, Priority
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_admitted_by_priority():
+    """
+    Tests that a freed slot goes to the highest-priority waiter, not the oldest one.
+    """
+    # Arrange
+    controller = AdmissionController({"main_llm": 1}, max_queue=4, queue_timeout=1.0, retry_after=3)
+    order = []
+
+    async def call(name, priority):
+        async with controller.slot("main_llm", priority):
+            order.append(name)
+
+    # Act
+    async with controller.slot("main_llm"):
+        low = asyncio.create_task(call("low", Priority.LOW))
+        high = asyncio.create_task(call("high", Priority.HIGH))
+        await asyncio.sleep(0)
+    await asyncio.gather(low, high)
+
+    # Assert
+    assert order == ["high", "low"]
+    assert controller.stats()["main_llm"] == {"limit": 1, "active": 0, "queued": 0}
+
+
+@pytest.mark.asyncio
+async def test_overload_is_shed_with_retry_after():
+    """
+    Tests that a full queue rejects lower-priority work and that waiting past the deadline is rejected.
+    """
+    # Arrange
+    controller = AdmissionController({"tts": 1}, max_queue=1, queue_timeout=0.05, retry_after=7)
+
+    # Act
+    async with controller.slot("tts"):
+        queued = asyncio.create_task(controller.slot("tts", Priority.LOW).__aenter__())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            async with controller.slot("tts", Priority.LOW):
+                pass
+        with pytest.raises(AdmissionRejected) as expired:
+            await queued
+
+    # Assert
+    assert (full.value.reason, full.value.retry_after) == ("queue_full", 7)
+    assert expired.value.reason == "deadline"
+    assert controller.stats()["tts"]["active"] == 0
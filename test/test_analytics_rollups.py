@@ -0,0 +1,122 @@
+# tests/test_analytics_rollups.py
+
+import sys
+import os
+import datetime
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.api.v1.schemas.analytics import ConversationCreate
+from app.crud import crud_analytics, crud_conversation
+from app.models.conversation import Conversation
+
+
+async def _make_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_update_rollups_aggregates_per_bucket():
+    """
+    Tests that logged conversations are folded into hourly and daily buckets.
+    """
+    # Arrange
+    engine, session_factory = await _make_session()
+    timestamp = datetime.datetime(2025, 8, 17, 10, 30)
+    conversations = [
+        Conversation(session_id="a", ai_response="x" * 80, timestamp=timestamp, user_audio_path="a.wav"),
+        Conversation(session_id="a", ai_response="x" * 600, timestamp=timestamp, mailto="mailto:me"),
+        Conversation(session_id="b", ai_response="x" * 90, timestamp=timestamp, ai_audio_path="b.mp3"),
+    ]
+    intents = ["general_inquiry", "create_email", "recruiter"]
+
+    # Act
+    async with session_factory() as db:
+        for conversation, intent in zip(conversations, intents):
+            await crud_analytics.update_rollups(db, conversation, intent=intent)
+        hourly = await crud_analytics.get_rollups(
+            db, "hour", datetime.datetime(2025, 8, 17), datetime.datetime(2025, 8, 18)
+        )
+        daily = await crud_analytics.get_rollups(
+            db, "day", datetime.datetime(2025, 8, 17), datetime.datetime(2025, 8, 18)
+        )
+    await engine.dispose()
+
+    # Assert
+    assert len(hourly) == 1 and len(daily) == 1
+    bucket = hourly[0]
+    assert bucket["bucket_start"] == datetime.datetime(2025, 8, 17, 10)
+    assert bucket["message_count"] == 3
+    assert bucket["distinct_sessions"] == 2
+    assert bucket["intents"] == {"general_inquiry": 1, "create_email": 1, "recruiter": 1}
+    assert (bucket["audio_in"], bucket["audio_out"], bucket["mailto_conversions"]) == (1, 1, 1)
+    assert bucket["answer_length_percentiles"] == {"p50": 100, "p90": 1000, "p99": 1000}
+    assert daily[0]["distinct_sessions"] == 2
+
+
+def test_estimate_percentile_caps_overflow_bucket():
+    """
+    Tests that answers longer than the largest bucket are reported at the largest bound.
+    """
+    # Arrange
+    histogram = {"inf": 3}
+
+    # Act
+    p50 = crud_analytics.estimate_percentile(histogram, 50)
+
+    # Assert
+    assert p50 == crud_analytics.ANSWER_LENGTH_BUCKETS[-1]
+    assert crud_analytics.estimate_percentile({}, 50) is None
+
+
+@pytest.mark.asyncio
+async def test_conversation_and_rollups_are_written_in_one_transaction(monkeypatch):
+    """
+    Tests that a conversation is committed together with its rollups in a few statements,
+    and is not committed when the rollup write fails.
+    """
+    # Arrange
+    engine, session_factory = await _make_session()
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    conversation = ConversationCreate(session_id="a", user_message="hi", ai_response="hello", suggested_questions=[])
+
+    # Act
+    async with session_factory() as db:
+        logged = await crud_conversation.create_conversation(db, conversation, commit=False)
+        await crud_analytics.update_rollups(db, logged, intent="general_inquiry")
+    logging_statements = len(statements)
+
+    async def failing_upsert(db, bucket_starts, session_id):
+        raise RuntimeError("rollups unavailable")
+
+    monkeypatch.setattr(crud_analytics, "_mark_session_seen", failing_upsert)
+    async with session_factory() as db:
+        failed = await crud_conversation.create_conversation(db, conversation, commit=False)
+        with pytest.raises(RuntimeError):
+            await crud_analytics.update_rollups(db, failed)
+
+    async with session_factory() as db:
+        stored = await crud_conversation.get_conversations(db)
+        hourly = await crud_analytics.get_rollups(
+            db, "hour", crud_analytics.get_bucket_start(logged.timestamp, "hour"), datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        )
+    await engine.dispose()
+
+    # Assert
+    # The conversation insert, the session insert and the rollup upsert
+    assert logging_statements == 3
+    assert [row.id for row in stored] == [logged.id]
+    assert hourly[0]["message_count"] == 1
+    assert hourly[0]["distinct_sessions"] == 1
+    assert hourly[0]["intents"] == {"general_inquiry": 1}
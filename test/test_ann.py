@@ -0,0 +1,89 @@
+# tests/test_ann.py
+
+import sys
+import os
+import faiss
+import numpy as np
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import ann
+
+
+def test_approximate_indexes_find_exact_neighbours_with_wide_search():
+    """
+    Tests that every index type, trained on a sample, returns the exact nearest neighbour when searched widely.
+    """
+    # Arrange
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32)).astype(np.float32) * 10
+    vectors = (centers[rng.integers(0, 20, size=2000)] + rng.normal(size=(2000, 32))).astype(np.float32)
+    queries = vectors[:25]
+
+    # Act
+    found = {}
+    for index_type in ann.INDEX_TYPES:
+        index = ann.create_index(32, len(vectors), index_type, nlist=16, pq_m=8, pq_nbits=6)
+        ann.train_index(index, vectors, sample_size=1500)
+        index.add(vectors)
+        ann.set_search_params(index, nprobe=16, ef_search=128)
+        found[index_type] = index.search(queries, 1)[1][:, 0]
+
+    # Assert
+    for index_type in ("flat", "ivf_flat", "hnsw"):
+        assert (found[index_type] == np.arange(25)).all(), index_type
+    assert (found["ivf_pq"] == np.arange(25)).mean() >= 0.8
+
+
+def test_small_corpus_falls_back_to_flat_index():
+    """
+    Tests that a corpus too small to train an IVF index gets an exact one, and that search parameters are applied.
+    """
+    # Act
+    small = ann.create_index(32, 100, "ivf_pq", pq_m=8)
+    large = ann.create_index(32, 10000, "ivf_flat")
+    ann.set_search_params(large, nprobe=12)
+
+    # Assert
+    assert ann.describe_index(small) == "Flat"
+    assert ann.describe_index(large) == f"IVF-Flat nlist={ann.default_nlist(10000)} nprobe=12"
+    with pytest.raises(ValueError):
+        ann.create_index(32, 10000, "lsh")
+
+
+def test_pq_m_must_divide_dimension():
+    """
+    Tests that an IVF-PQ index whose sub-quantizer count does not divide the dimension is rejected.
+    """
+    # Act / Assert
+    with pytest.raises(ValueError):
+        ann.create_index(30, 10000, "ivf_pq", pq_m=8)
+
+
+def test_search_params_apply_to_a_reloaded_index(tmp_path):
+    """
+    Tests that search parameters are applied to indexes read back from disk, as workers load them.
+    """
+    # Arrange
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(2000, 32)).astype(np.float32)
+    paths = {}
+    for index_type in ("ivf_pq", "hnsw"):
+        index = ann.create_index(32, len(vectors), index_type, nlist=16, pq_m=8, pq_nbits=6)
+        ann.train_index(index, vectors, sample_size=1500)
+        index.add(vectors)
+        paths[index_type] = str(tmp_path / f"{index_type}.faiss")
+        faiss.write_index(index, paths[index_type])
+
+    # Act
+    ivf_pq = faiss.read_index(paths["ivf_pq"])
+    hnsw = faiss.read_index(paths["hnsw"])
+    ann.set_search_params(ivf_pq, nprobe=12, ef_search=128)
+    ann.set_search_params(hnsw, nprobe=12, ef_search=128)
+
+    # Assert
+    assert ann.describe_index(ivf_pq) == "IVF-PQ nlist=16 nprobe=12"
+    assert ann.describe_index(hnsw) == "HNSW efSearch=128"
+    assert ivf_pq.search(vectors[:5], 3)[1].shape == (5, 3)
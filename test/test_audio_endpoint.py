@@ -0,0 +1,107 @@
+# tests/test_audio_endpoint.py
+
+import sys
+import os
+import time
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.api.v1.endpoints import audio
+from app.core.utils import get_tts_cache_path, keep_cached_audio, prune_tts_cache
+
+AUDIO_ID = "ab" * 32
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIO_DIR", str(tmp_path))
+    os.makedirs(tmp_path / "tts")
+    (tmp_path / "tts" / f"{AUDIO_ID}.mp3").write_bytes(bytes(range(100)))
+    app = FastAPI()
+    app.include_router(audio.router, prefix="/audio")
+    return TestClient(app)
+
+
+def test_audio_supports_ranges_and_revalidation(client):
+    """
+    Tests that cached audio is served with byte ranges, ETag revalidation and immutable caching.
+    """
+    # Act
+    full = client.get(f"/audio/{AUDIO_ID}.mp3")
+    partial = client.get(f"/audio/{AUDIO_ID}.mp3", headers={"Range": "bytes=10-19"})
+    suffix = client.get(f"/audio/{AUDIO_ID}.mp3", headers={"Range": "bytes=-5"})
+    unsatisfiable = client.get(f"/audio/{AUDIO_ID}.mp3", headers={"Range": "bytes=200-"})
+    not_modified = client.get(f"/audio/{AUDIO_ID}.mp3", headers={"If-None-Match": full.headers["ETag"]})
+
+    # Assert
+    assert full.status_code == 200 and full.content == bytes(range(100))
+    assert "immutable" in full.headers["Cache-Control"]
+    assert partial.status_code == 206
+    assert partial.content == bytes(range(10, 20))
+    assert partial.headers["Content-Range"] == "bytes 10-19/100"
+    assert suffix.content == bytes(range(95, 100))
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["Content-Range"] == "bytes */100"
+    assert not_modified.status_code == 304
+
+
+def test_unknown_or_invalid_audio_ids_are_not_found(client):
+    """
+    Tests that only well-formed IDs of cached files are served.
+    """
+    # Act
+    missing = client.get(f"/audio/{'cd' * 32}.mp3")
+    traversal = client.get("/audio/..%2F..%2Fetc%2Fpasswd.mp3")
+
+    # Assert
+    assert missing.status_code == 404
+    assert traversal.status_code == 404
+
+
+def test_tts_cache_prunes_expired_then_least_recently_used(tmp_path):
+    """
+    Tests that pruning deletes answers past the age cap, then the oldest ones until the cache fits the size cap.
+    """
+    # Arrange
+    cache_dir = tmp_path / "tts"
+    os.makedirs(cache_dir)
+    now = time.time()
+    for name, age in (("expired", 3600), ("old", 300), ("recent", 200), ("new", 100)):
+        path = cache_dir / f"{name}.mp3"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (now - age, now - age))
+    (cache_dir / "pending.mp3.abc.tmp").write_bytes(b"x" * 100)
+
+    # Act
+    removed = prune_tts_cache(str(tmp_path), max_age_seconds=1800, max_bytes=200)
+
+    # Assert
+    assert removed == 2
+    assert sorted(os.listdir(cache_dir)) == ["new.mp3", "pending.mp3.abc.tmp", "recent.mp3"]
+
+
+def test_logged_answer_audio_survives_cache_pruning(tmp_path):
+    """
+    Tests that audio kept for a conversation stays readable after its cache entry is pruned.
+    """
+    # Arrange
+    cache_path = get_tts_cache_path(AUDIO_ID)
+    os.makedirs(tmp_path / "tts")
+    (tmp_path / cache_path).write_bytes(b"answer audio")
+
+    # Act
+    kept = keep_cached_audio(str(tmp_path), cache_path, "session_1.mp3")
+    removed = prune_tts_cache(str(tmp_path), max_age_seconds=0, max_bytes=1)
+
+    # Assert
+    assert removed == 1
+    assert not (tmp_path / cache_path).exists()
+    assert (tmp_path / kept).read_bytes() == b"answer audio"
+    with pytest.raises(FileNotFoundError):
+        keep_cached_audio(str(tmp_path), cache_path, "session_2.mp3")
@@ -0,0 +1,112 @@
+# tests/test_database_pool.py
+
+import sys
+import os
+import time
+import asyncio
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from prometheus_client import REGISTRY
+
+from app.core import database
+from app.api.v1.endpoints.analytics import read_pool_stats
+from app.api.v1.schemas.analytics import PoolStats
+
+CONNECT_DELAY = 0.2
+HOLD_SECONDS = 0.2
+
+
+def _sample(name: str) -> float:
+    return REGISTRY.get_sample_value(name) or 0.0
+
+
+def _engine(monkeypatch, tmp_path, pool_timeout: float = 5.0):
+    """
+    Builds a single-connection instrumented engine whose connects take CONNECT_DELAY,
+    and makes it the engine reported by /analytics/db-pool.
+    """
+    url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+    options = {**database._engine_options(url), "pool_size": 1, "max_overflow": 0, "pool_timeout": pool_timeout}
+    engine = create_async_engine(url, **options)
+    database.instrument_engine(engine)
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def _slow_connect(dialect, connection_record, cargs, cparams):
+        time.sleep(CONNECT_DELAY)
+
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "pool_stats", database.PoolStats())
+    return engine
+
+
+async def _hold(engine, seconds: float) -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await asyncio.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_checkout_wait_excludes_connect_time(monkeypatch, tmp_path):
+    """
+    Tests that waiting for a busy connection is recorded as checkout wait, while the time
+    spent opening the connection is only recorded as connect time.
+    """
+    # Arrange
+    engine = _engine(monkeypatch, tmp_path)
+    waits_before = _sample("db_pool_checkout_wait_seconds_count")
+    wait_sum_before = _sample("db_pool_checkout_wait_seconds_sum")
+    connects_before = _sample("db_pool_connect_seconds_count")
+    connect_sum_before = _sample("db_pool_connect_seconds_sum")
+
+    # Act
+    holder = asyncio.create_task(_hold(engine, HOLD_SECONDS))
+    await asyncio.sleep(0.05)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await holder
+    stats = PoolStats.model_validate(await read_pool_stats())
+    await engine.dispose()
+
+    # Assert
+    wait_sum = _sample("db_pool_checkout_wait_seconds_sum") - wait_sum_before
+    assert _sample("db_pool_checkout_wait_seconds_count") - waits_before == 2
+    # The second checkout queued behind the holder, which spent CONNECT_DELAY connecting first
+    assert HOLD_SECONDS * 0.5 < wait_sum < HOLD_SECONDS + CONNECT_DELAY
+    assert _sample("db_pool_connect_seconds_count") - connects_before == 1
+    assert _sample("db_pool_connect_seconds_sum") - connect_sum_before >= CONNECT_DELAY
+    assert stats.checkouts == 2
+    assert stats.connects == 1
+    assert stats.connect_avg_ms >= CONNECT_DELAY * 1000
+    assert stats.checkout_wait_max_ms == pytest.approx(wait_sum * 1000, rel=0.5)
+    assert stats.timeouts == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_timeout_is_reported(monkeypatch, tmp_path):
+    """
+    Tests that a checkout timing out on an exhausted pool is counted in the metrics
+    and in /analytics/db-pool.
+    """
+    # Arrange
+    engine = _engine(monkeypatch, tmp_path, pool_timeout=0.1)
+    timeouts_before = _sample("db_pool_timeouts_total")
+
+    # Act
+    async with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect():
+                pass
+        stats = PoolStats.model_validate(await read_pool_stats())
+    await engine.dispose()
+
+    # Assert
+    assert _sample("db_pool_timeouts_total") - timeouts_before == 1
+    assert stats.timeouts == 1
+    assert stats.checked_out == 1
+    assert stats.pool_size == 1
+    assert stats.max_overflow == 0
@@ -0,0 +1,95 @@
+# tests/test_hedging.py
+
+import sys
+import os
+import asyncio
+import pytest
+from uuid import uuid4
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prometheus_client import REGISTRY
+
+from app.core.hedging import hedged_stream, GenerationTimeout
+from app.services.callbacks import StageTimingCallbackHandler
+
+
+async def _tokens(name, first_delay, tokens=("a", "b"), gap=0.0, log=None):
+    try:
+        await asyncio.sleep(first_delay)
+        for token in tokens:
+            yield f"{name}:{token}"
+            await asyncio.sleep(gap)
+    finally:
+        if log is not None:
+            log.append(name)
+
+
+@pytest.mark.asyncio
+async def test_stalled_primary_is_hedged_and_cancelled():
+    """
+    Tests that a primary stream missing the first-token deadline loses to the fallback and is closed.
+    """
+    # Arrange
+    closed = []
+    winners = []
+
+    # Act
+    tokens = [
+        token async for token in hedged_stream(
+            _tokens("primary", first_delay=5, log=closed),
+            lambda: _tokens("fallback", first_delay=0.01),
+            first_token_timeout=0.05,
+            inter_token_timeout=1.0,
+            on_winner=winners.append,
+        )
+    ]
+
+    # Assert
+    assert tokens == ["fallback:a", "fallback:b"]
+    assert winners == ["fallback"]
+    assert closed == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_inter_token_stall_raises_timeout():
+    """
+    Tests that a stream stalling after its first token raises GenerationTimeout.
+    """
+    # Arrange
+    received = []
+
+    # Act
+    with pytest.raises(GenerationTimeout):
+        async for token in hedged_stream(
+            _tokens("primary", first_delay=0, gap=5),
+            None,
+            first_token_timeout=1.0,
+            inter_token_timeout=0.05,
+        ):
+            received.append(token)
+
+    # Assert
+    assert received == ["primary:a"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_llm_calls_are_not_upstream_errors():
+    """
+    Tests that a model call cancelled by a lost hedge race is not counted as an error,
+    and that failures are counted under the service the handler was created for.
+    """
+    # Arrange
+    handler = StageTimingCallbackHandler(service="fallback_llm")
+    fallback_before = REGISTRY.get_sample_value("chat_upstream_errors_total", {"service": "fallback_llm"}) or 0.0
+    main_before = REGISTRY.get_sample_value("chat_upstream_errors_total", {"service": "main_llm"}) or 0.0
+
+    # Act
+    await handler.on_llm_error(asyncio.CancelledError(), run_id=uuid4())
+    await handler.on_llm_error(GeneratorExit(), run_id=uuid4())
+    await handler.on_llm_error(RuntimeError("quota exceeded"), run_id=uuid4())
+
+    # Assert
+    assert REGISTRY.get_sample_value("chat_upstream_errors_total", {"service": "fallback_llm"}) - fallback_before == 1
+    assert (REGISTRY.get_sample_value("chat_upstream_errors_total", {"service": "main_llm"}) or 0.0) == main_before
@@ -0,0 +1,131 @@
+# tests/test_knowledge_reload.py
+
+import sys
+import os
+import pytest
+from types import SimpleNamespace
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import knowledge
+from app.services.chat_service import ChatService
+
+
+def _fake_version(root, version):
+    path = os.path.join(root, knowledge.VERSIONS_DIR, version)
+    os.makedirs(path)
+    open(os.path.join(path, "index.faiss"), "wb").close()
+
+
+@pytest.mark.asyncio
+async def test_publish_and_prune_versions(tmp_path, monkeypatch):
+    """
+    Tests that publishing moves the version pointer and pruning keeps the published version.
+    """
+    # Arrange
+    monkeypatch.setattr(knowledge, "VECTOR_STORE_PATH", str(tmp_path))
+    for version in ["v1", "v2", "v3"]:
+        _fake_version(str(tmp_path), version)
+
+    # Act
+    before = knowledge.get_current_version()
+    knowledge.publish_version("v1")
+    removed = knowledge.prune_versions(keep=1)
+
+    # Assert
+    assert before is None
+    assert knowledge.get_current_version() == "v1"
+    assert removed == ["v2"]
+    assert knowledge.list_versions() == ["v1", "v3"]
+    with pytest.raises(ValueError):
+        knowledge.get_version_path("../outside")
+
+
+@pytest.mark.asyncio
+async def test_sync_knowledge_swaps_retriever_and_drops_chains(tmp_path, monkeypatch):
+    """
+    Tests that a worker picks up a newly published version, while chains built on the old index stay usable.
+    """
+    # Arrange
+    monkeypatch.setattr(knowledge, "VECTOR_STORE_PATH", str(tmp_path))
+    monkeypatch.setattr(knowledge, "get_retriever", lambda version=None, tenant=None: f"retriever-{version}")
+    for version in ["v1", "v2"]:
+        _fake_version(str(tmp_path), version)
+    knowledge.publish_version("v1")
+    chat_service = ChatService()
+    tenant = chat_service.tenants.get()
+    await chat_service.knowledge.reload(tenant)
+    in_flight = chat_service.knowledge.peek(tenant.id)
+    old_chain = object()
+    in_flight.chain_cache[("prompt", False)] = old_chain
+
+    # Act
+    unchanged = await chat_service.knowledge.sync(tenant)
+    knowledge.publish_version("v2")
+    reloaded = await chat_service.knowledge.sync(tenant)
+
+    # Assert
+    current = chat_service.knowledge.peek(tenant.id)
+    assert (unchanged, reloaded) == (False, True)
+    assert current.version == "v2"
+    assert current.retriever == "retriever-v2"
+    assert current.chain_cache == {}
+    assert in_flight.chain_cache[("prompt", False)] is old_chain
+
+
+def test_failed_build_leaves_no_temporary_directory(tmp_path, monkeypatch):
+    """
+    Tests that an index build that fails while saving removes its partial temporary directory.
+    """
+    # Arrange
+    class _FailingStore:
+        def save_local(self, path):
+            os.makedirs(path)
+            open(os.path.join(path, "index.faiss"), "wb").close()
+            raise OSError("disk full")
+
+    monkeypatch.setattr(knowledge, "VECTOR_STORE_PATH", str(tmp_path))
+    os.makedirs(tmp_path / knowledge.VERSIONS_DIR)
+    monkeypatch.setattr(knowledge, "_load_documents", lambda tenant: [])
+    monkeypatch.setattr(knowledge, "_embeddings", lambda task_type: None)
+    monkeypatch.setattr(knowledge, "build_vector_store", lambda docs, embeddings: _FailingStore())
+
+    # Act
+    with pytest.raises(OSError):
+        knowledge.build_index_version()
+
+    # Assert
+    assert os.listdir(tmp_path / knowledge.VERSIONS_DIR) == []
+
+
+def test_admin_endpoints_require_admin_key(monkeypatch):
+    """
+    Tests that the admin endpoints accept only ADMIN_API_KEY, not the analytics key, and are closed while it is unset.
+    """
+    # Arrange
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.api.v1.endpoints import admin
+    from app.services.chat_service import get_chat_service
+
+    chat_service = SimpleNamespace(knowledge=SimpleNamespace(snapshot=lambda: []))
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    app.dependency_overrides[get_chat_service] = lambda: chat_service
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "ANALYTICS_API_KEY", "analytics")
+
+    # Act
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", None)
+    unset = client.get("/admin/tenants", headers={"X-API-Key": "analytics"})
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin")
+    with_analytics_key = client.post("/admin/knowledge/reload", headers={"X-API-Key": "analytics"})
+    with_admin_key = client.get("/admin/tenants", headers={"X-API-Key": "admin"})
+
+    # Assert
+    assert unset.status_code == 403
+    assert with_analytics_key.status_code == 403
+    assert with_admin_key.status_code == 200
+    assert with_admin_key.json() == []
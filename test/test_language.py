@@ -0,0 +1,48 @@
+# tests/test_language.py
+
+import sys
+import os
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import language
+from app.core.language import LanguageContext, resolve_language
+
+
+def test_language_resolution_order():
+    """
+    Tests that the recognizer's language wins, then detection on the message, then the hint, then the default.
+    """
+    # Arrange
+    indonesian = "Apa saja proyek yang dibuat Fadhil?"
+    english = "What projects has Fadhil built?"
+
+    # Act
+    from_stt = resolve_language(hint="en-US", message=english, stt_language_code="id-id")
+    detected = resolve_language(hint="en-US", message=indonesian)
+    from_hint = resolve_language(hint="id-ID", message="ok")
+    default = resolve_language(hint="fr-FR", message="ok")
+
+    # Assert
+    assert from_stt == LanguageContext("id", "stt")
+    assert detected == LanguageContext("id", "detected")
+    assert from_hint == LanguageContext("id", "hint")
+    assert default == LanguageContext("en", "default")
+    assert (detected.locale, detected.name) == ("id-ID", "Indonesian")
+
+
+def test_detection_is_cached_per_normalized_message():
+    """
+    Tests that repeated messages differing only in case and whitespace are detected once.
+    """
+    # Arrange
+    language._detect.cache_clear()
+
+    # Act
+    first = language.detect_language("Ceritakan tentang pengalaman kerja Fadhil")
+    second = language.detect_language("  ceritakan tentang   PENGALAMAN kerja fadhil ")
+
+    # Assert
+    assert first == second == "id"
+    assert language._detect.cache_info().hits == 1
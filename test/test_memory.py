@@ -0,0 +1,116 @@
+# tests/test_memory.py
+
+import sys
+import os
+import asyncio
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.services.memory import BudgetedChatMessageHistory, message_tokens
+
+
+@pytest.mark.asyncio
+async def test_old_turns_are_folded_into_a_summary_within_budget():
+    """
+    Tests that turns beyond the token budget are summarized in the background and the prompt history stays bounded.
+    """
+    # Arrange
+    summarized = []
+
+    async def summarize(history):
+        folded = list(history.pending)
+        summarized.append(len(folded))
+        history.apply_summary(f"{len(summarized)} summaries so far", folded)
+
+    history = BudgetedChatMessageHistory(token_budget=100, summarize=summarize)
+    turn = [HumanMessage(content="q" * 120), AIMessage(content="a" * 160)]
+
+    # Act
+    for _ in range(10):
+        await history.aadd_messages(turn)
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    messages = await history.aget_messages()
+
+    # Assert
+    assert isinstance(messages[0], SystemMessage)
+    assert "summaries so far" in messages[0].content
+    assert history.pending == []
+    assert history.recent == turn
+    assert sum(summarized) == 18
+
+
+def test_history_is_kept_verbatim_without_a_summarizer():
+    """
+    Tests that evicted turns stay visible when no summary can be produced.
+    """
+    # Arrange
+    history = BudgetedChatMessageHistory(token_budget=10)
+
+    # Act
+    history.add_messages([HumanMessage(content="hello there"), AIMessage(content="hi! how can I help?")])
+    history.add_messages([HumanMessage(content="projects?"), AIMessage(content="NutriChef and LawBot.")])
+
+    # Assert
+    assert [m.content for m in history.messages][0] == "hello there"
+    assert len(history.messages) == 4
+    assert len(history.recent) == 2
+
+
+@pytest.mark.asyncio
+async def test_pending_turns_are_capped_when_summaries_fail():
+    """
+    Tests that a failing summarizer cannot make the history grow past twice the token budget.
+    """
+    # Arrange
+    async def summarize(history):
+        raise RuntimeError("helper LLM shed")
+
+    history = BudgetedChatMessageHistory(token_budget=100, summarize=summarize)
+    turn = [HumanMessage(content="q" * 120), AIMessage(content="a" * 160)]
+
+    # Act
+    for _ in range(10):
+        await history.aadd_messages(turn)
+        await asyncio.sleep(0)
+
+    # Assert
+    assert history.summary == ""
+    assert history.recent == turn
+    assert history.pending
+    assert message_tokens(history.pending) <= 2 * history.token_budget
+
+
+@pytest.mark.asyncio
+async def test_summary_started_before_clear_is_discarded():
+    """
+    Tests that a summary finishing after the history was cleared does not restore the old conversation.
+    """
+    # Arrange
+    release = asyncio.Event()
+
+    async def summarize(history):
+        generation = history.generation
+        folded = list(history.pending)
+        await release.wait()
+        history.apply_summary("stale summary", folded, generation)
+
+    history = BudgetedChatMessageHistory(token_budget=10, summarize=summarize)
+    history.add_messages([HumanMessage(content="old question " * 5), AIMessage(content="old answer " * 5)])
+    history.add_messages([HumanMessage(content="q"), AIMessage(content="a")])
+    await asyncio.sleep(0)
+
+    # Act
+    history.clear()
+    history.add_messages([HumanMessage(content="new"), AIMessage(content="turn")])
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    # Assert
+    assert history.summary == ""
+    assert [m.content for m in history.messages] == ["new", "turn"]
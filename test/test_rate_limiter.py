@@ -0,0 +1,82 @@
+# tests/test_rate_limiter.py
+
+import sys
+import os
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from starlette.requests import Request
+
+from app.core import limiter as limiter_module
+from app.core.limiter import TokenBucketLimiter, RateLimitExceeded, request_cost
+
+
+def _request(peer: str, forwarded: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers, "client": (peer, 1234)})
+
+
+@pytest.mark.asyncio
+async def test_bucket_is_shared_between_workers(tmp_path):
+    """
+    Tests that two limiter instances (e.g. two gunicorn workers) draw from the same bucket.
+    """
+    # Arrange
+    storage_url = f"sqlite+aiosqlite:///{tmp_path / 'ratelimit.db'}"
+    worker_a = TokenBucketLimiter(capacity=6, refill_per_minute=1, trusted_proxies=[], storage_url=storage_url)
+    worker_b = TokenBucketLimiter(capacity=6, refill_per_minute=1, trusted_proxies=[], storage_url=storage_url)
+    audio_request_cost = request_cost("hi", audio_in=True, audio_out=True)
+
+    # Act
+    await worker_a.hit(_request("10.0.0.1"), cost=audio_request_cost)
+    await worker_b.hit(_request("10.0.0.1"), cost=1)
+    with pytest.raises(RateLimitExceeded) as exceeded:
+        await worker_a.hit(_request("10.0.0.1"), cost=1)
+    await worker_b.hit(_request("10.0.0.2"), cost=1)
+
+    # Assert
+    assert audio_request_cost == 5
+    assert exceeded.value.retry_after > 0
+
+
+def test_forwarded_for_is_only_trusted_from_proxies():
+    """
+    Tests that X-Forwarded-For is ignored from untrusted peers and resolved from the right otherwise.
+    """
+    # Arrange
+    limiter = TokenBucketLimiter(capacity=5, refill_per_minute=5, trusted_proxies=["10.0.0.0/8"])
+
+    # Act
+    spoofed = limiter.client_key(_request("203.0.113.9", forwarded="1.2.3.4"))
+    proxied = limiter.client_key(_request("10.0.0.5", forwarded="1.2.3.4, 198.51.100.7, 10.0.0.3"))
+
+    # Assert
+    assert spoofed == "203.0.113.9"
+    assert proxied == "198.51.100.7"
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_only_buckets_that_refilled(tmp_path, monkeypatch):
+    """
+    Tests that pruning removes buckets idle long enough to be full and keeps recently used ones.
+    """
+    # Arrange
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(limiter_module.time, "time", lambda: clock["now"])
+    storage_url = f"sqlite+aiosqlite:///{tmp_path / 'ratelimit.db'}"
+    limiter = TokenBucketLimiter(capacity=6, refill_per_minute=6, trusted_proxies=[], storage_url=storage_url)
+    await limiter.hit(_request("10.0.0.1"), cost=6)
+    clock["now"] += 50
+    await limiter.hit(_request("10.0.0.2"), cost=6)
+
+    # Act
+    clock["now"] += 30 # 10.0.0.1 idle for 80 s, past the 60 s refill time; 10.0.0.2 for 30 s
+    removed = await limiter.prune()
+
+    # Assert
+    assert removed == 1
+    with pytest.raises(RateLimitExceeded):
+        await limiter.hit(_request("10.0.0.2"), cost=6)
+    await limiter.hit(_request("10.0.0.1"), cost=6)
@@ -0,0 +1,65 @@
+# tests/test_singleflight.py
+
+import sys
+import os
+import asyncio
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_stream_is_shared_and_replayed_to_late_subscribers():
+    """
+    Tests that identical streams run once and that a subscriber joining mid-stream still receives every item.
+    """
+    # Arrange
+    flights = SingleFlight()
+    started = []
+
+    async def generate():
+        started.append(True)
+        for token in ["Hello", " ", "world"]:
+            yield token
+            await asyncio.sleep(0.01)
+
+    async def collect(tokens):
+        return [token async for token in tokens]
+
+    # Act
+    first, first_leads = flights.stream("q", generate)
+    first_task = asyncio.create_task(collect(first))
+    await asyncio.sleep(0.015)
+    second, second_leads = flights.stream("q", generate)
+    results = await asyncio.gather(first_task, collect(second))
+
+    # Assert
+    assert (first_leads, second_leads) == (True, False)
+    assert results == [["Hello", " ", "world"]] * 2
+    assert len(started) == 1
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_do_coalesces_concurrent_calls():
+    """
+    Tests that concurrent calls with the same key share one result.
+    """
+    # Arrange
+    flights = SingleFlight()
+    calls = []
+
+    async def classify():
+        calls.append(True)
+        await asyncio.sleep(0.01)
+        return "recruiter"
+
+    # Act
+    results = await asyncio.gather(*(flights.do("intent", classify) for _ in range(5)))
+
+    # Assert
+    assert results == ["recruiter"] * 5
+    assert len(calls) == 1
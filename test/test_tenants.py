@@ -0,0 +1,127 @@
+# tests/test_tenants.py
+
+import sys
+import os
+import json
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from app.core import knowledge
+from app.core.tenants import DEFAULT_TENANT_ID, Tenant, TenantNotProvisioned, UnknownTenant, load_tenants
+from app.services.knowledge_registry import KnowledgeRegistry, TenantKnowledge
+from app.services.chat_service import ChatService
+
+
+def _tenant(tenant_id):
+    return {
+        "id": tenant_id,
+        "name": tenant_id.title(),
+        "sources": [{"type": "web", "path": f"https://{tenant_id}.example.com"}],
+        "contact_email": f"{tenant_id}@example.com",
+    }
+
+
+@pytest.mark.asyncio
+async def test_load_tenants_keeps_default_and_rejects_unknown(tmp_path):
+    """
+    Tests that the tenants file adds tenants next to the default one and unknown IDs are rejected.
+    """
+    # Arrange
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps([_tenant("alice")]))
+
+    # Act
+    registry = load_tenants(str(path))
+
+    # Assert
+    assert registry.get().id == DEFAULT_TENANT_ID
+    assert registry.get("alice").contact_email == "alice@example.com"
+    assert len(registry) == 2
+    with pytest.raises(UnknownTenant):
+        registry.get("bob")
+    with pytest.raises(ValueError):
+        Tenant(**{**_tenant("carol"), "sources": None})
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_least_recently_used_tenant(tmp_path, monkeypatch):
+    """
+    Tests that indexes load on first use and the least recently used one is evicted when over budget.
+    """
+    # Arrange
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps([_tenant("alice"), _tenant("bob"), _tenant("carol")]))
+    tenants = load_tenants(str(path))
+    registry = KnowledgeRegistry(tenants, memory_budget_bytes=250, max_loaded=10)
+    monkeypatch.setattr(
+        registry, "_open", lambda tenant, version=None: TenantKnowledge(tenant, "v1", f"retriever-{tenant.id}", 100)
+    )
+
+    # Act
+    alice = await registry.get(tenants.get("alice"))
+    await registry.get(tenants.get("bob"))
+    await registry.get(tenants.get("alice"))
+    await registry.get(tenants.get("carol"))
+
+    # Assert
+    assert alice.retriever == "retriever-alice"
+    assert [entry.tenant.id for entry in registry.loaded()] == ["alice", "carol"]
+    assert registry.stats_for("bob").evictions == 1
+    assert registry.stats_for("alice").requests == 2
+    assert registry.memory_bytes() == 200
+
+
+@pytest.mark.asyncio
+async def test_unprovisioned_tenant_is_not_built_on_request(tmp_path, monkeypatch):
+    """
+    Tests that a chat request for a tenant without a published index fails fast instead of building one.
+    """
+    # Arrange
+    monkeypatch.setattr(knowledge, "VECTOR_STORE_PATH", str(tmp_path))
+    builds = []
+    monkeypatch.setattr(knowledge, "build_index_version", lambda tenant=None: builds.append(tenant.id))
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps([_tenant("alice")]))
+    tenants = load_tenants(str(path))
+    registry = KnowledgeRegistry(tenants, memory_budget_bytes=2**30, max_loaded=10)
+
+    # Act / Assert
+    with pytest.raises(TenantNotProvisioned):
+        await registry.get(tenants.get("alice"))
+    assert builds == []
+    assert registry.peek("alice") is None
+
+
+@pytest.mark.asyncio
+async def test_session_summary_is_framed_around_its_tenant(tmp_path):
+    """
+    Tests that a tenant's conversation summaries name that tenant's portfolio owner.
+    """
+    # Arrange
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps([_tenant("alice")]))
+    chat_service = ChatService()
+    chat_service.tenants = load_tenants(str(path))
+    prompts = []
+
+    def fake_llm(prompt_value):
+        prompts.append(prompt_value.to_string())
+        return AIMessage(content="summary")
+
+    chat_service.helper_llm = RunnableLambda(fake_llm)
+    history = chat_service.get_session_history(ChatService.session_key("alice", "s1"))
+    history.pending = [HumanMessage(content="Hi"), AIMessage(content="Hello")]
+
+    # Act
+    await history._summarize(history)
+
+    # Assert
+    assert ChatService.session_tenant_id(ChatService.session_key("alice", "s1")) == "alice"
+    assert ChatService.session_tenant_id(ChatService.session_key(DEFAULT_TENANT_ID, "s1")) == DEFAULT_TENANT_ID
+    assert "Alice's portfolio assistant" in prompts[0]
+    assert history.summary == "summary"
@@ -0,0 +1,111 @@
+# tests/test_warmup.py
+
+import sys
+import os
+from types import SimpleNamespace
+import faiss
+import numpy as np
+import pytest
+
+# Add the project root to the Python path to resolve the ModuleNotFoundError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import knowledge
+from app.services.chat_service import ChatService
+from app.services.warmup import Warmup
+
+
+class _FakeRetriever:
+    def __init__(self):
+        index = faiss.IndexFlatL2(8)
+        index.add(np.random.default_rng(0).random((10, 8), dtype=np.float32))
+        self.vectorstore = SimpleNamespace(index=index)
+        self.queries = []
+
+    async def ainvoke(self, query):
+        self.queries.append(query)
+        return []
+
+
+class _FakeChannel:
+    def __init__(self):
+        self.connected = False
+
+    async def channel_ready(self):
+        self.connected = True
+
+
+def _fake_client():
+    return SimpleNamespace(transport=SimpleNamespace(grpc_channel=_FakeChannel()))
+
+
+def _chat_service(monkeypatch, retriever=None, build_error=None):
+    """A ChatService whose knowledge index and upstream clients are all local fakes."""
+    def ensure_current_version(tenant=None):
+        if build_error:
+            raise RuntimeError(build_error)
+        return "v1"
+
+    monkeypatch.setattr(knowledge, "ensure_current_version", ensure_current_version)
+    monkeypatch.setattr(knowledge, "get_current_version", lambda tenant=None: "v1")
+    monkeypatch.setattr(knowledge, "get_retriever", lambda version=None, tenant=None: retriever)
+    monkeypatch.setattr(knowledge, "version_size_bytes", lambda version, tenant=None: 0)
+    chat_service = ChatService()
+    chat_service.llm = SimpleNamespace(async_client=_fake_client())
+    chat_service.fallback_llm = SimpleNamespace(async_client=_fake_client())
+    chat_service.helper_llm = SimpleNamespace(async_client=_fake_client())
+    return chat_service
+
+
+@pytest.mark.asyncio
+async def test_warmup_loads_index_builds_chains_and_connects(monkeypatch):
+    """
+    Tests that warm-up loads the default index, builds both chain variants for both prompts, opens every connection and replays the questions.
+    """
+    # Arrange
+    retriever = _FakeRetriever()
+    chat_service = _chat_service(monkeypatch, retriever)
+    tenant = chat_service.tenants.get()
+    built = []
+    monkeypatch.setattr(chat_service, "get_rag_chain", lambda knowledge, prompt, fallback=False: built.append((prompt, fallback)))
+    audio_service = SimpleNamespace(stt_client=_fake_client(), tts_client=_fake_client())
+    warmup = Warmup(chat_service, audio_service, questions=["What projects have you built?"])
+
+    # Act
+    before = warmup.report()["status"]
+    await warmup.run()
+
+    # Assert
+    assert before == "warming_up"
+    assert warmup.ready and warmup.report()["status"] == "ready"
+    assert warmup.errors == {}
+    assert chat_service.knowledge.peek(tenant.id).version == "v1"
+    assert len(built) == 4
+    assert set(built) == {
+        (prompt, fallback)
+        for prompt in (tenant.system_prompt, tenant.hiring_manager_prompt)
+        for fallback in (False, True)
+    }
+    clients = [chat_service.llm.async_client, chat_service.helper_llm.async_client, audio_service.tts_client]
+    assert all(client.transport.grpc_channel.connected for client in clients)
+    assert retriever.queries == ["What projects have you built?"]
+
+
+@pytest.mark.asyncio
+async def test_warmup_knowledge_failure_keeps_worker_unready(monkeypatch):
+    """
+    Tests that a failed index load is reported, skips dependent stages and keeps the worker unready.
+    """
+    # Arrange
+    chat_service = _chat_service(monkeypatch, build_error="index unavailable")
+    audio_service = SimpleNamespace(stt_client=None, tts_client=None)
+    warmup = Warmup(chat_service, audio_service, questions=["Hello"])
+
+    # Act
+    await warmup.run()
+
+    # Assert
+    assert warmup.done and not warmup.ready
+    assert warmup.report()["status"] == "failed"
+    assert warmup.errors == {"knowledge": "index unavailable"}
+    assert "chains" not in warmup.stages and "questions" not in warmup.stages